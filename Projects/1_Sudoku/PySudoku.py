@@ -1,9 +1,51 @@
+"""Replay the solution of a Sudoku puzzle with pygame.
+
+play() shows the replay in a window. render() draws the same replay headlessly
+(with the SDL "dummy" video driver) as a stream of frames, keeping only the
+current frame in memory, and save_frames()/save_animation() write the stream to
+numbered PNG files or to an animated file (the latter needs imageio):
+
+    python PySudoku.py --headless replay.gif
+
+Both are driven by the compact trace of a HistoryRecorder (see utils.py).
+"""
+import argparse
 import sys, os, random, pygame
-sys.path.append(os.path.join("objects"))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "objects"))
 import SudokuSquare
 from utils import *
 from GameResources import *
 
+BOARD_IMAGE = os.path.join(HERE, "images", "sudoku-board-bare.jpg")
+
+
+def draw_board(screen, background_image, values):
+    """Draw the values dictionary on the screen surface"""
+    theSquares = []
+    initXLoc = 0
+    initYLoc = 0
+    startX, startY, editable, number = 0, 0, "N", 0
+    for y in range(9):
+        for x in range(9):
+            if x in (0, 1, 2):  startX = (x * 57) + 38
+            if x in (3, 4, 5):  startX = (x * 57) + 99
+            if x in (6, 7, 8):  startX = (x * 57) + 159
+
+            if y in (0, 1, 2):  startY = (y * 57) + 35
+            if y in (3, 4, 5):  startY = (y * 57) + 100
+            if y in (6, 7, 8):  startY = (y * 57) + 165
+            string_number = values[rows[y] + cols[x]]
+            if len(string_number) > 1 or string_number == '' or string_number == '.':
+                number = None
+            else:
+                number = int(string_number)
+            theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
+
+    screen.blit(background_image, (0, 0))
+    for num in theSquares:
+        num.draw()
+
 
 def play(values, result, history):
     assignments = reconstruct(result, history)
@@ -12,35 +54,13 @@ def play(values, result, history):
     size = width, height = 700, 700
     screen = pygame.display.set_mode(size)
 
-    background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+    background_image = pygame.image.load(BOARD_IMAGE).convert()
 
     clock = pygame.time.Clock()
 
     while True:
         pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                string_number = values[rows[y] + cols[x]]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
+        draw_board(screen, background_image, values)
 
         pygame.display.flip()
         pygame.display.update()
@@ -57,3 +77,109 @@ def play(values, result, history):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 quit()
+
+
+def render(values, history, every=1):
+    """Generate the frames of a replay without opening a window
+
+    The SDL "dummy" video driver is used unless SDL_VIDEODRIVER is already set.
+    One surface is redrawn for every frame, so only the current frame is held in
+    memory; copy a frame (surface.copy()) to keep it past the next iteration.
+    pygame is shut down when the generator is exhausted or closed.
+
+    Parameters
+    ----------
+    values(dict)
+        the values dictionary of the starting puzzle
+
+    history(HistoryRecorder or iterable)
+        the recorded trace, or any iterable of (box, value) assignments
+
+    every(int)
+        draw a frame after every this many assignments (the starting board and
+        the final board are always drawn)
+
+    Returns
+    -------
+    generator
+        yields the pygame.Surface holding the current frame
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode((700, 700))
+        background_image = pygame.image.load(BOARD_IMAGE).convert()
+        assignments = history.replay() if isinstance(history, HistoryRecorder) else iter(history)
+
+        values = dict(values)
+        draw_board(screen, background_image, values)
+        yield screen
+        pending = 0
+        for box, value in assignments:
+            values[box] = value
+            pending += 1
+            if pending == every:
+                draw_board(screen, background_image, values)
+                yield screen
+                pending = 0
+        if pending:
+            draw_board(screen, background_image, values)
+            yield screen
+    finally:
+        # forked processes (e.g. a process pool) hang if SDL is left initialized
+        pygame.quit()
+
+
+def save_frames(frames, directory, pattern="frame_{:05d}.png"):
+    """Write each frame to a numbered image file and return the number of frames"""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        pygame.image.save(frame, os.path.join(directory, pattern.format(count - 1)))
+    return count
+
+
+def save_animation(frames, path, fps=5):
+    """Append each frame to an animated file (GIF, MP4, ...) and return the number of frames
+
+    Requires the optional imageio package (and imageio-ffmpeg for video formats).
+    """
+    import imageio
+    count = 0
+    with imageio.get_writer(path, fps=fps) as writer:
+        for count, frame in enumerate(frames, 1):
+            writer.append_data(pygame.surfarray.array3d(frame).swapaxes(0, 1))
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the solution of a diagonal Sudoku.")
+    parser.add_argument('grid', nargs='?',
+                        default='2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3',
+                        help="The puzzle to solve, as an 81-character grid string.")
+    parser.add_argument('--headless', metavar='OUTPUT',
+                        help="Render without a window to OUTPUT: a directory of PNG frames, or " +
+                        "an animated file such as replay.gif if OUTPUT has an extension.")
+    parser.add_argument('--every', type=int, default=1,
+                        help="Assignments per rendered frame.")
+    parser.add_argument('--fps', type=int, default=5,
+                        help="Frame rate of an animated file.")
+    args = parser.parse_args(argv)
+
+    from solution import solve
+    values = grid2values(args.grid)
+    with HistoryRecorder() as history:
+        result = solve(args.grid, engine='dict')
+    if not result:
+        sys.exit("the puzzle has no solution")
+
+    if args.headless is None:
+        play(values, result, history)
+    elif os.path.splitext(args.headless)[1]:
+        print(save_animation(render(values, history, args.every), args.headless, args.fps), "frames")
+    else:
+        print(save_frames(render(values, history, args.every), args.headless), "frames")
+
+
+if __name__ == "__main__":
+    main()
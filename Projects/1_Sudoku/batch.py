@@ -0,0 +1,165 @@
+"""Solve many Sudoku puzzles across a pool of worker processes.
+
+Usage:
+
+    python batch.py puzzles.txt -o solutions.txt --workers 8
+
+The input holds one 81-character puzzle per line ('.' or '0' for empty boxes).
+Solutions are written in input order, one grid string per line; a puzzle with
+no solution, or a malformed line (reported on stderr), produces an empty line so
+the output stays aligned with the input.
+With --stats FILE, the solver statistics of each puzzle (see stats.py) are
+written to FILE as one JSON object per line, and the totals for the whole batch
+are printed to stderr.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+
+from solution import ENGINES, solve
+from stats import SolverStats
+from utils import values2grid
+
+
+def _map_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def imap_ordered(func, iterable, workers=None, chunksize=64, backlog=2):
+    """Map func over iterable in order, lazily, using a process pool if workers != 1
+
+    Unlike Pool.imap, which reads its whole input ahead of the workers, at most
+    backlog chunks per worker are read from the iterable and in flight at any
+    time, so memory stays bounded however long the input is.
+
+    Parameters
+    ----------
+    func(callable)
+        a picklable function of one argument
+
+    iterable(iterable)
+        the arguments; consumed lazily, chunksize items at a time
+
+    workers(int)
+        the number of worker processes; None uses one per CPU and 1 maps in the
+        calling process
+
+    chunksize(int)
+        the number of items sent to a worker at a time
+
+    backlog(int)
+        the number of chunks per worker that may be queued or running
+    """
+    if workers == 1:
+        yield from map(func, iterable)
+        return
+    workers = workers or os.cpu_count() or 1
+    items = iter(iterable)
+    pending = deque()
+    with Pool(workers) as pool:
+        while True:
+            while len(pending) < backlog * workers:
+                chunk = list(islice(items, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.apply_async(_map_chunk, (func, chunk)))
+            if not pending:
+                return
+            yield from pending.popleft().get()
+
+
+def _solve_grid(grid, engine='bitmask', with_stats=False):
+    stats = SolverStats() if with_stats else None
+    try:
+        values = solve(grid, engine=engine, stats=stats)
+    except ValueError as e:
+        # a malformed grid must not abort the rest of the batch
+        print("skipping invalid puzzle {!r}: {}".format(grid, e), file=sys.stderr)
+        values = False
+    return (values, stats) if with_stats else values
+
+
+def solve_many(grids, workers=None, chunksize=64, engine='bitmask', with_stats=False):
+    """Solve a stream of Sudoku puzzles, yielding the results in input order
+
+    Parameters
+    ----------
+    grids(iterable)
+        strings representing sudoku grids (see solution.solve); the iterable is
+        consumed lazily, so it may be a file or a generator
+
+    workers(int)
+        the number of worker processes; None uses one per CPU and 1 solves in the
+        calling process
+
+    chunksize(int)
+        the number of puzzles sent to a worker at a time
+
+    engine(string)
+        the solver backend passed to solution.solve
+
+    with_stats(bool)
+        if True, collect a SolverStats for every puzzle
+
+    Returns
+    -------
+    generator
+        yields the dictionary representation of each solved grid, or False if
+        the corresponding puzzle has no solution or is malformed (reported on
+        stderr); with_stats yields (result, SolverStats) pairs instead
+    """
+    func = partial(_solve_grid, engine=engine, with_stats=with_stats)
+    return imap_ordered(func, grids, workers, chunksize)
+
+
+def _solve_line(grid, engine='bitmask', with_stats=False):
+    result = _solve_grid(grid, engine, with_stats)
+    values, stats = result if with_stats else (result, None)
+    line = values2grid(values) if values else ''
+    return (line, stats) if with_stats else line
+
+
+def _read_grids(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line.replace('0', '.')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of diagonal Sudoku puzzles " +
+        "(one 81-character grid per line) on a pool of worker processes.")
+    parser.add_argument('puzzles', type=argparse.FileType('r'),
+                        help="Input file with one puzzle per line, or - for stdin.")
+    parser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help="Output file for the solutions (default: stdout).")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-c', '--chunksize', type=int, default=64,
+                        help="Number of puzzles handed to a worker at a time.")
+    parser.add_argument('-e', '--engine', default='bitmask', choices=sorted(ENGINES),
+                        help="Solver backend passed to solution.solve.")
+    parser.add_argument('--stats', type=argparse.FileType('w'), default=None,
+                        help="Write per-puzzle solver statistics to this file as JSON lines.")
+    args = parser.parse_args(argv)
+
+    with_stats = args.stats is not None
+    solve_line = partial(_solve_line, engine=args.engine, with_stats=with_stats)
+    total = SolverStats.aggregate([])
+    for result in imap_ordered(solve_line, _read_grids(args.puzzles), args.workers, args.chunksize):
+        if with_stats:
+            result, stats = result
+            args.stats.write(stats.to_json() + '\n')
+            total.merge(stats)
+        args.output.write(result + '\n')
+    if with_stats:
+        print(json.dumps(total.to_dict(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
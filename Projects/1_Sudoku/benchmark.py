@@ -0,0 +1,122 @@
+"""Report solve time and search effort versus Sudoku board size.
+
+Usage:
+
+    python benchmark.py --sizes 3 4 5 --puzzles 20 --holes 0.5
+
+For each box size, a solution of the empty board is found once; puzzles are
+derived from it by relabelling the digits at random (and transposing half of
+the time), which keeps every row, column, region and diagonal valid, and then
+clearing a fraction of the boxes. Such puzzles may have several solutions; they
+are a stress workload rather than a collection of well-posed puzzles. Note that
+search effort grows very steeply with the fraction of cleared boxes on large
+boards: a 25x25 board with 60% of its boxes cleared can take minutes to solve.
+"""
+import argparse
+import random
+from timeit import default_timer as timer
+
+from solution import ENGINE_CLASSES, board_solver
+from utils import make_board
+
+
+def make_puzzles(size, count, holes, diagonal=True, seed=None):
+    """Generate count grid strings for a (size**2 x size**2) board
+
+    Parameters
+    ----------
+    size(int)
+        the side length of the square regions
+
+    count(int)
+        the number of puzzles to generate
+
+    holes(float)
+        the fraction of boxes to clear in each puzzle
+
+    diagonal(bool)
+        whether the two main diagonals are units too
+
+    seed(int)
+        seed for the random number generator
+    """
+    rng = random.Random(seed)
+    board = make_board(size, diagonal)
+    n = size * size
+    solved = board_solver(size, diagonal, 'dlx').solve('.' * n ** 2)
+    base = [solved[box] for box in board.boxes]
+
+    puzzles = []
+    for _ in range(count):
+        relabel = dict(zip(board.digits, rng.sample(board.digits, n)))
+        cells = [relabel[d] for d in base]
+        if rng.random() < 0.5:
+            cells = [cells[c * n + r] for r in range(n) for c in range(n)]
+        for i in rng.sample(range(n ** 2), int(holes * n ** 2)):
+            cells[i] = '.'
+        puzzles.append(''.join(cells))
+    return puzzles
+
+
+def benchmark(size, puzzles, diagonal=True, engine='bitmask'):
+    """Solve the puzzles on one board size and summarize the effort
+
+    Returns
+    -------
+    dict
+        the number of puzzles and of solved puzzles, the mean and maximum solve
+        time in seconds, and (for the bitmask engine) the mean number of search
+        nodes and the maximum search depth
+    """
+    solver = board_solver(size, diagonal, engine)
+    times, nodes, depths, solved = [], [], [], 0
+    for grid in puzzles:
+        start = timer()
+        result = solver.solve(grid)
+        times.append(timer() - start)
+        solved += bool(result)
+        if hasattr(solver, 'nodes'):
+            nodes.append(solver.nodes)
+            depths.append(solver.max_depth)
+    return {
+        'size': size,
+        'puzzles': len(puzzles),
+        'solved': solved,
+        'mean_time': sum(times) / len(times),
+        'max_time': max(times),
+        'mean_nodes': sum(nodes) / len(nodes) if nodes else None,
+        'max_depth': max(depths) if depths else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku engines on " +
+        "generated puzzles of increasing board size.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[3, 4, 5],
+                        help="Region sizes to benchmark (3 is the 9x9 board).")
+    parser.add_argument('--puzzles', type=int, default=20,
+                        help="Number of puzzles per board size.")
+    parser.add_argument('--holes', type=float, default=0.5,
+                        help="Fraction of boxes cleared in each puzzle.")
+    parser.add_argument('--engine', default='bitmask', choices=sorted(ENGINE_CLASSES),
+                        help="Solver backend to benchmark.")
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help="Do not add the two diagonal units.")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed for the puzzle generator.")
+    args = parser.parse_args(argv)
+
+    print("{:>7}  {:>7}  {:>7}  {:>12}  {:>12}  {:>10}  {:>9}".format(
+        'board', 'puzzles', 'solved', 'mean time', 'max time', 'mean nodes', 'max depth'))
+    for size in args.sizes:
+        puzzles = make_puzzles(size, args.puzzles, args.holes, args.diagonal, args.seed)
+        row = benchmark(size, puzzles, args.diagonal, args.engine)
+        n = size * size
+        print("{:>7}  {:>7}  {:>7}  {:>11.4f}s  {:>11.4f}s  {:>10}  {:>9}".format(
+            '{}x{}'.format(n, n), row['puzzles'], row['solved'], row['mean_time'], row['max_time'],
+            '-' if row['mean_nodes'] is None else '{:.1f}'.format(row['mean_nodes']),
+            '-' if row['max_depth'] is None else row['max_depth']))
+
+
+if __name__ == "__main__":
+    main()
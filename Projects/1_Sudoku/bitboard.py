@@ -0,0 +1,381 @@
+"""Bitmask board engine for (diagonal) Sudoku.
+
+The dictionary representation used in solution.py stores the candidates for
+each box as a string like '1379'. This module stores the same information as
+an integer bitmask (bit ``k`` is set when digit ``digits[k]`` is still a
+candidate) in a flat list with one slot per box, so the strategies reduce to
+bit operations over precomputed index tables.
+
+The tables are derived from a ``unitlist`` like the one in solution.py, so any
+unit configuration (including the diagonal units) is honored automatically.
+"""
+from collections import deque
+from time import perf_counter
+
+from topology import compile_topology
+from utils import boxes, digits
+
+
+DIGITS = digits
+
+# Boards with more digits than this count bits on the fly instead of using a table
+POPCOUNT_TABLE_BITS = 16
+
+
+class Contradiction(Exception):
+    """Raised as soon as propagation leaves a box (or a unit digit) without a place"""
+
+
+class _Popcount:
+    """Stand-in for the popcount lookup table on boards with many digits"""
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+class BitmaskSolver:
+    """Solve Sudoku puzzles over a flat list of candidate bitmasks
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    digits(str)
+        the symbols that may be placed in a box, in bit order
+    """
+    def __init__(self, unitlist, boxes=boxes, digits=DIGITS):
+        topology = compile_topology(unitlist, boxes)
+        self.boxes = list(topology.boxes)
+        self.digits = digits
+        self.index = topology.index
+        self.full = (1 << len(digits)) - 1
+        self.bit = {d: 1 << k for k, d in enumerate(digits)}
+        self.symbol = {1 << k: d for k, d in enumerate(digits)}
+        if len(digits) <= POPCOUNT_TABLE_BITS:
+            self.popcount = [bin(m).count('1') for m in range(self.full + 1)]
+        else:
+            self.popcount = _Popcount()
+        self._strings = {}
+
+        self.units = topology.units
+        self.box_units = topology.box_units
+        self.peer_sets = topology.peer_sets
+        self.peers = topology.peers
+        self._common_peers = {}
+
+        # size of the tree explored by the last call to search()
+        self.nodes = 0
+        self.max_depth = 0
+
+    def grid2cands(self, grid):
+        """Convert a grid string into a list of candidate bitmasks"""
+        return [self.full if val == '.' else self.bit[val] for val in grid]
+
+    def values2cands(self, values):
+        """Convert a values dictionary into a list of candidate bitmasks"""
+        bit = self.bit
+        cands = []
+        for box in self.boxes:
+            mask = 0
+            for d in values[box]:
+                mask |= bit[d]
+            cands.append(mask)
+        return cands
+
+    def cands2values(self, cands):
+        """Convert a list of candidate bitmasks into a values dictionary"""
+        strings = self._strings
+        values = {}
+        for box, mask in zip(self.boxes, cands):
+            string = strings.get(mask)
+            if string is None:
+                string = strings[mask] = ''.join(d for d in self.digits if mask & self.bit[d])
+            values[box] = string
+        return values
+
+    def eliminate(self, cands):
+        """Remove the digit of every solved box from the candidates of its peers"""
+        popcount = self.popcount
+        solved = [(i, m) for i, m in enumerate(cands) if popcount[m] == 1]
+        for i, mask in solved:
+            clear = ~mask
+            for p in self.peers[i]:
+                cands[p] &= clear
+        return cands
+
+    def only_choice(self, cands):
+        """Assign every digit that fits in exactly one box of a unit to that box"""
+        for unit in self.units:
+            once = twice = 0
+            for i in unit:
+                m = cands[i]
+                twice |= once & m
+                once |= m
+            unique = once & ~twice
+            if unique:
+                for i in unit:
+                    if cands[i] & unique:
+                        cands[i] &= unique
+        return cands
+
+    def naked_twins(self, cands):
+        """Eliminate the digits of every pair of naked twins from their common peers
+
+        All twin pairs are taken from the input, so eliminating one pair never
+        hides another pair from the same call (see solution.naked_twins).
+        """
+        popcount = self.popcount
+        out = list(cands)
+        for i, m in enumerate(cands):
+            if popcount[m] != 2:
+                continue
+            for p in self.peers[i]:
+                if p > i and cands[p] == m:
+                    clear = ~m
+                    for q in self.peer_sets[i] & self.peer_sets[p]:
+                        out[q] &= clear
+        return out
+
+    def common_peers(self, i, j):
+        """Return the boxes that are peers of both box i and box j (cached)"""
+        key = (i, j) if i < j else (j, i)
+        common = self._common_peers.get(key)
+        if common is None:
+            common = self._common_peers[key] = tuple(self.peer_sets[i] & self.peer_sets[j])
+        return common
+
+    def propagate(self, cands, changed=None, trail=None, stats=None):
+        """Apply the strategies in place, revisiting only what changed
+
+        Boxes whose candidates changed are kept on a work queue. A box that becomes
+        solved eliminates its digit from its peers, and every unit of a changed box
+        is queued for only choice and naked twins. The queue of boxes is drained
+        before the next unit is examined, so the cheap eliminations always run first.
+
+        Parameters
+        ----------
+        cands(list)
+            a list of candidate bitmasks; it is modified in place
+
+        changed(iterable)
+            indices of the boxes that changed since the last fixpoint, or None to
+            start from every box
+
+        trail(list)
+            if given, a (box index, previous bitmask) pair is appended for every
+            write so the changes can be reverted with undo()
+
+        stats(SolverStats)
+            if given, record the candidates removed by and the time spent in each
+            strategy, and count this call as one reduction round
+
+        Returns
+        -------
+        list
+            The same candidate list after reaching a fixpoint
+
+        Raises
+        ------
+        Contradiction
+            as soon as any box is left without candidates
+        """
+        popcount = self.popcount
+        peers = self.peers
+        box_units = self.box_units
+        box_queued = [False] * len(cands)
+        unit_queued = [False] * len(self.units)
+        box_queue = deque()
+        unit_queue = deque()
+        if trail is None:
+            trail = []
+        record = trail.append
+
+        def push(i):
+            if not box_queued[i]:
+                box_queued[i] = True
+                box_queue.append(i)
+
+        for i in (range(len(cands)) if changed is None else changed):
+            push(i)
+        if stats is not None:
+            stats.rounds += 1
+
+        while box_queue or unit_queue:
+            if stats is not None and box_queue:
+                mark, start = len(trail), perf_counter()
+            else:
+                mark = None
+            while box_queue:
+                i = box_queue.popleft()
+                box_queued[i] = False
+                m = cands[i]
+                if not m:
+                    raise Contradiction(self.boxes[i])
+                if popcount[m] == 1:
+                    for p in peers[i]:
+                        pm = cands[p]
+                        if pm & m:
+                            pm &= ~m
+                            if not pm:
+                                raise Contradiction(self.boxes[p])
+                            record((p, cands[p]))
+                            cands[p] = pm
+                            push(p)
+                for u in box_units[i]:
+                    if not unit_queued[u]:
+                        unit_queued[u] = True
+                        unit_queue.append(u)
+            if mark is not None:
+                # every write of this phase removes exactly one candidate
+                stats.record('eliminate', len(trail) - mark, perf_counter() - start)
+            if unit_queue:
+                u = unit_queue.popleft()
+                unit_queued[u] = False
+                unit = self.units[u]
+                if stats is None:
+                    for i in self._only_choice_unit(cands, unit, record):
+                        push(i)
+                    for i in self._naked_twins_unit(cands, unit, record):
+                        push(i)
+                    continue
+                for name, strategy in (('only_choice', self._only_choice_unit),
+                                       ('naked_twins', self._naked_twins_unit)):
+                    mark, start = len(trail), perf_counter()
+                    for i in strategy(cands, unit, record):
+                        push(i)
+                    stats.record(name, self._removed_since(cands, trail, mark), perf_counter() - start)
+        return cands
+
+    def _removed_since(self, cands, trail, mark):
+        """Count the candidates removed by the writes recorded on the trail after mark"""
+        first = {}
+        for i, old in trail[mark:]:
+            first.setdefault(i, old)
+        popcount = self.popcount
+        return sum(popcount[old] - popcount[cands[i]] for i, old in first.items())
+
+    def _only_choice_unit(self, cands, unit, record):
+        once = twice = 0
+        for i in unit:
+            m = cands[i]
+            twice |= once & m
+            once |= m
+        if once != self.full and len(unit) == len(self.digits):
+            raise Contradiction(self.boxes[unit[0]])
+        unique = once & ~twice
+        changed = []
+        if unique:
+            for i in unit:
+                m = cands[i]
+                hit = m & unique
+                if hit and hit != m:
+                    if self.popcount[hit] > 1:
+                        raise Contradiction(self.boxes[i])
+                    record((i, m))
+                    cands[i] = hit
+                    changed.append(i)
+        return changed
+
+    def _naked_twins_unit(self, cands, unit, record):
+        popcount = self.popcount
+        changed = []
+        seen = {}
+        for i in unit:
+            m = cands[i]
+            if popcount[m] != 2:
+                continue
+            j = seen.setdefault(m, i)
+            if j == i:
+                continue
+            for q in self.common_peers(i, j):
+                qm = cands[q]
+                if qm & m:
+                    qm &= ~m
+                    if not qm:
+                        raise Contradiction(self.boxes[q])
+                    record((q, cands[q]))
+                    cands[q] = qm
+                    changed.append(q)
+        return changed
+
+    def reduce_puzzle(self, cands, changed=None, stats=None):
+        """Propagate the strategies to a fixpoint (see propagate)
+
+        Returns
+        -------
+        list or False
+            The reduced candidate list, or False if some box has no candidates left
+        """
+        try:
+            return self.propagate(cands, changed, stats=stats)
+        except Contradiction:
+            return False
+
+    @staticmethod
+    def undo(cands, trail, mark):
+        """Restore the candidates recorded on the trail after position mark"""
+        while len(trail) > mark:
+            i, m = trail.pop()
+            cands[i] = m
+
+    def search(self, cands, stats=None):
+        """Depth first search over the box with the fewest candidates
+
+        The search mutates a single candidate list in place. Every write is
+        recorded on an undo trail, and backtracking restores the entries recorded
+        since the branch was taken instead of copying the board for each branch.
+
+        Returns
+        -------
+        list or False
+            The solved candidate list (the input list itself), or False if the
+            puzzle has no solution, in which case the input is left unchanged
+        """
+        trail = []
+        self.nodes = self.max_depth = 0
+        if self._search(cands, None, trail, 0, stats):
+            return cands
+        return False
+
+    def _search(self, cands, changed, trail, depth, stats):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if stats is not None:
+            stats.visit(depth)
+        mark = len(trail)
+        try:
+            self.propagate(cands, changed, trail, stats)
+        except Contradiction:
+            self.undo(cands, trail, mark)
+            return False
+        popcount = self.popcount
+        n, s = min(((popcount[m], i) for i, m in enumerate(cands) if popcount[m] > 1),
+                   default=(1, None))
+        if s is None:
+            return True
+        mask = cands[s]
+        branch = (s,)
+        reduced = len(trail)
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            trail.append((s, cands[s]))
+            cands[s] = bit
+            if stats is not None:
+                stats.branches += 1
+            if self._search(cands, branch, trail, depth + 1, stats):
+                return True
+            self.undo(cands, trail, reduced)
+        self.undo(cands, trail, mark)
+        return False
+
+    def solve(self, grid, stats=None):
+        """Solve a grid string, returning a values dictionary or False"""
+        cands = self.search(self.grid2cands(grid), stats)
+        if cands is False:
+            return False
+        return self.cands2values(cands)
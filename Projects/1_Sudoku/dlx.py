@@ -0,0 +1,215 @@
+"""Exact cover backend for Sudoku using Knuth's Dancing Links (Algorithm X).
+
+Every (box, digit) placement is a row of the exact cover matrix. The columns
+are the constraints that must be satisfied exactly once: each box holds one
+digit, and each unit of the ``unitlist`` holds each digit once. Because the
+columns are derived from the unitlist, the diagonal units of solution.py are
+enforced without any special handling. (Every unit must therefore contain as
+many boxes as there are digits.)
+
+The linked structure is stored in flat integer lists (left, right, up, down)
+that are built once per unit configuration and copied for each puzzle.
+
+See Also
+--------
+Knuth, "Dancing Links", https://arxiv.org/abs/cs/0011047
+"""
+from bitboard import DIGITS
+from topology import compile_topology
+from utils import boxes
+
+
+class DLXSolver:
+    """Solve and count the solutions of Sudoku puzzles by exact cover
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    digits(str)
+        the symbols that may be placed in a box
+    """
+    def __init__(self, unitlist, boxes=boxes, digits=DIGITS):
+        topology = compile_topology(unitlist, boxes)
+        self.boxes = list(topology.boxes)
+        self.digits = digits
+        self.digit_index = {d: k for k, d in enumerate(digits)}
+        n_boxes, n_digits = len(self.boxes), len(digits)
+        box_units = topology.box_units
+
+        # node 0 is the root, nodes 1..n_cols are the column headers
+        n_cols = n_boxes + len(topology.units) * n_digits
+        left = [c - 1 for c in range(n_cols + 1)]
+        right = [c + 1 for c in range(n_cols + 1)]
+        left[0], right[n_cols] = n_cols, 0
+        up = list(range(n_cols + 1))
+        down = list(range(n_cols + 1))
+        column = list(range(n_cols + 1))
+        row_of = [-1] * (n_cols + 1)
+        size = [0] * (n_cols + 1)
+
+        # row b * n_digits + k places digit k in box b; row_start holds its first node
+        self.row_start = []
+        for b in range(n_boxes):
+            for k in range(n_digits):
+                cols = [1 + b] + [1 + n_boxes + u * n_digits + k for u in box_units[b]]
+                first = len(left)
+                self.row_start.append(first)
+                for c in cols:
+                    x = len(left)
+                    left.append(x - 1)
+                    right.append(x + 1)
+                    up.append(up[c])
+                    down.append(c)
+                    down[up[c]] = x
+                    up[c] = x
+                    column.append(c)
+                    row_of.append(b * n_digits + k)
+                    size[c] += 1
+                left[first] = len(left) - 1
+                right[-1] = first
+
+        self._links = (left, right, up, down, size)
+        self._column = column
+        self._row_of = row_of
+
+    def _solutions(self, grid, stats=None):
+        """Yield each solution of the grid as a list of exact cover row numbers"""
+        left, right, up, down, size = (list(a) for a in self._links)
+        column, row_of = self._column, self._row_of
+        covered = [False] * len(size)
+
+        def cover(c):
+            covered[c] = True
+            right[left[c]] = right[c]
+            left[right[c]] = left[c]
+            i = down[c]
+            while i != c:
+                j = right[i]
+                while j != i:
+                    down[up[j]] = down[j]
+                    up[down[j]] = up[j]
+                    size[column[j]] -= 1
+                    j = right[j]
+                i = down[i]
+
+        def uncover(c):
+            i = up[c]
+            while i != c:
+                j = left[i]
+                while j != i:
+                    size[column[j]] += 1
+                    down[up[j]] = j
+                    up[down[j]] = j
+                    j = left[j]
+                i = up[i]
+            right[left[c]] = c
+            left[right[c]] = c
+            covered[c] = False
+
+        givens = []
+        n_digits = len(self.digits)
+        for b, val in enumerate(grid):
+            if val == '.':
+                continue
+            k = self.digit_index.get(val)
+            if k is None:
+                raise ValueError("invalid character in grid: {!r}".format(val))
+            x = self.row_start[b * n_digits + k]
+            j = x
+            while True:
+                if covered[column[j]]:
+                    return
+                cover(column[j])
+                j = right[j]
+                if j == x:
+                    break
+            givens.append(b * n_digits + k)
+
+        partial = list(givens)
+        n_givens = len(givens)
+
+        def search():
+            if stats is not None:
+                stats.visit(len(partial) - n_givens)
+            c = right[0]
+            if c == 0:
+                yield partial
+                return
+            # choose the column with the fewest remaining rows
+            best, j = c, right[c]
+            while j != 0 and size[best] > 1:
+                if size[j] < size[best]:
+                    best = j
+                j = right[j]
+            c = best
+            if not size[c]:
+                return
+            cover(c)
+            r = down[c]
+            while r != c:
+                partial.append(row_of[r])
+                if stats is not None:
+                    stats.branches += 1
+                j = right[r]
+                while j != r:
+                    cover(column[j])
+                    j = right[j]
+                yield from search()
+                j = left[r]
+                while j != r:
+                    uncover(column[j])
+                    j = left[j]
+                partial.pop()
+                r = down[r]
+            uncover(c)
+
+        yield from search()
+
+    def _rows2values(self, rows):
+        n_digits = len(self.digits)
+        values = {}
+        for row in rows:
+            b, k = divmod(row, n_digits)
+            values[self.boxes[b]] = self.digits[k]
+        return {box: values[box] for box in self.boxes}
+
+    def solutions(self, grid, limit=None, stats=None):
+        """Generate the solutions of a grid string as values dictionaries
+
+        Parameters
+        ----------
+        grid(string)
+            a string representing a sudoku grid (see solution.solve)
+
+        limit(int)
+            stop after this many solutions; None generates all of them
+
+        stats(SolverStats)
+            if given, count the search nodes, depth and branches
+        """
+        for n, rows in enumerate(self._solutions(grid, stats)):
+            if limit is not None and n >= limit:
+                return
+            yield self._rows2values(rows)
+
+    def solve(self, grid, stats=None):
+        """Return the first solution of a grid string as a values dictionary, or False"""
+        return next(self.solutions(grid, limit=1, stats=stats), False)
+
+    def count_solutions(self, grid, limit=2):
+        """Count the solutions of a grid string, stopping once limit is reached
+
+        The default limit of 2 is enough to tell whether a puzzle has a unique
+        solution (count == 1) without enumerating every solution.
+        """
+        count = 0
+        for _ in self._solutions(grid):
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
@@ -0,0 +1,157 @@
+"""Generate diagonal Sudoku puzzles with a unique solution.
+
+Usage:
+
+    python generator.py 10000 --difficulty hard -o puzzles.txt --workers 8
+
+Each puzzle starts from a random solved board. Clues are then removed one at a
+time in random order, and a removal is kept only if the puzzle still has exactly
+one solution (checked with the Dancing Links solution counter, which stops at the
+second solution) and is not harder than the target difficulty. Each removal
+depends on the ones before it, so the clues of one puzzle are removed in a
+single process; the parallelism is across puzzles, which are generated
+independently on a pool of worker processes. The puzzle with index k only
+depends on the seed and k, so the output is reproducible for any number of
+workers.
+
+The difficulty of a puzzle is graded by the strategies needed to solve it:
+
+    easy       solved by eliminate, only choice and naked twins alone
+    medium     solved by reduction with every strategy in solution.STRATEGIES
+    hard       requires search
+"""
+import argparse
+import random
+import sys
+from functools import partial
+
+from batch import imap_ordered
+from solution import STRATEGIES, bitmask_solver, boxes, count_solutions, diag_units1, dlx_solver, reduce_puzzle
+from utils import digits, grid2values
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def grade(grid):
+    """Return the difficulty ('easy', 'medium' or 'hard') of a grid string"""
+    cands = bitmask_solver.reduce_puzzle(bitmask_solver.grid2cands(grid))
+    if cands is not False and all(len(v) == 1 for v in bitmask_solver.cands2values(cands).values()):
+        return 'easy'
+    values = reduce_puzzle(grid2values(grid), strategies=STRATEGIES.names())
+    if values is not False and all(len(v) == 1 for v in values.values()):
+        return 'medium'
+    return 'hard'
+
+
+def random_solution(rng):
+    """Return a random solved diagonal Sudoku as a grid string
+
+    A random permutation of the digits is placed on the main diagonal (which is
+    always consistent) and the rest of the board is completed by Dancing Links,
+    retrying with another permutation in the rare case it cannot be completed.
+    """
+    while True:
+        cells = dict.fromkeys(boxes, '.')
+        cells.update(zip(diag_units1, rng.sample(digits, len(digits))))
+        values = dlx_solver.solve(''.join(cells[box] for box in boxes))
+        if values:
+            return ''.join(values[box] for box in boxes)
+
+
+def make_puzzle(rng, difficulty='hard', max_attempts=50):
+    """Generate one puzzle with a unique solution and the given difficulty
+
+    Parameters
+    ----------
+    rng(random.Random)
+        the random number generator
+
+    difficulty(string)
+        one of DIFFICULTIES; removals that would make the puzzle harder are
+        rejected, and a puzzle that ends up easier is discarded
+
+    max_attempts(int)
+        the number of solved boards to try before giving up
+
+    Returns
+    -------
+    string
+        the grid string of the puzzle ('.' for empty boxes)
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError("difficulty must be one of {}".format(', '.join(DIFFICULTIES)))
+    target = DIFFICULTIES.index(difficulty)
+    for _ in range(max_attempts):
+        cells = list(random_solution(rng))
+        order = list(range(len(cells)))
+        rng.shuffle(order)
+        for i in order:
+            digit, cells[i] = cells[i], '.'
+            grid = ''.join(cells)
+            if count_solutions(grid) != 1:
+                cells[i] = digit
+            elif target < DIFFICULTIES.index('hard') and DIFFICULTIES.index(grade(grid)) > target:
+                cells[i] = digit
+        grid = ''.join(cells)
+        if grade(grid) == difficulty:
+            return grid
+    raise RuntimeError("no {} puzzle found in {} attempts".format(difficulty, max_attempts))
+
+
+def _make_puzzle(index, seed, difficulty):
+    return make_puzzle(random.Random('{}-{}'.format(seed, index)), difficulty)
+
+
+def generate(count, difficulty='hard', seed=None, workers=None, chunksize=4):
+    """Generate count puzzles, yielding them as grid strings
+
+    Parameters
+    ----------
+    count(int)
+        the number of puzzles to generate
+
+    difficulty(string)
+        one of DIFFICULTIES
+
+    seed(int)
+        the seed the puzzles are derived from; None picks a random seed
+
+    workers(int)
+        the number of worker processes; None uses one per CPU and 1 generates in
+        the calling process
+
+    chunksize(int)
+        the number of puzzles sent to a worker at a time
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    func = partial(_make_puzzle, seed=seed, difficulty=difficulty)
+    return imap_ordered(func, range(count), workers, chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate diagonal Sudoku puzzles " +
+        "with a unique solution.")
+    parser.add_argument('count', type=int, help="Number of puzzles to generate.")
+    parser.add_argument('-d', '--difficulty', default='hard', choices=DIFFICULTIES,
+                        help="Target difficulty of the puzzles.")
+    parser.add_argument('-o', '--output', help="Output file (default: stdout).")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-c', '--chunksize', type=int, default=4,
+                        help="Puzzles sent to a worker at a time.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for the generator (default: random).")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for grid in generate(args.count, args.difficulty, args.seed, args.workers, args.chunksize):
+            out.write(grid + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
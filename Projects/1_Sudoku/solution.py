@@ -1,4 +1,13 @@
+from functools import lru_cache
+from itertools import combinations
+from time import perf_counter
+
 from utils import *
+from bitboard import BitmaskSolver
+from dlx import DLXSolver
+from stats import SolverStats
+from strategies import (StrategyRegistry, hidden_subsets, intersecting_pairs, locked_candidates,
+                        naked_subsets, x_wing)
 
 row_units = [cross(r, cols) for r in rows]
 column_units = [cross(rows, c) for c in cols]
@@ -17,6 +26,16 @@ unitlist.append(diag_units2)
 units = extract_units(unitlist, boxes)
 peers = extract_peers(units, boxes)
 
+# Alternative engines sharing the same unit configuration (see solve())
+bitmask_solver = BitmaskSolver(unitlist, boxes)
+dlx_solver = DLXSolver(unitlist, boxes)
+
+
+@lru_cache(maxsize=None)
+def common_peers(box1, box2):
+    """Return the boxes that are peers of both box1 and box2"""
+    return tuple(peers[box1] & peers[box2])
+
 
 def naked_twins(values):
     """Eliminate values using the naked twins strategy.
@@ -55,59 +74,30 @@ def naked_twins(values):
     Pseudocode for this algorithm on github:
     https://github.com/udacity/artificial-intelligence/blob/master/Projects/1_Sudoku/pseudocode.md
     """
-    # TODO: Implement this function!
+    # Group the two-candidate boxes of each unit by their candidate set, so that
+    # twins are found with one pass per unit instead of comparing every box with
+    # all of its peers. Twins are detected on the input values and their digits
+    # come from the input too, so every pair of the original input is processed.
     output = values.copy()
-
-    #(1) Execute for each unit, rather than each box & peer
-    # It worked well to get the answer, but unittest fails. I'd better to execute for every box & peer...
-    if 0: # Leave the old codes (It worked to get the answer, but there're fails in the unittest)
-        for unit in unitlist:
-            twin_candidates = [box for box in unit if len(output[box]) == 2]
-            #if twin_candidates!=[]:
-                #print("-----------")
-                #print(twin_candidates)
-            if(len(twin_candidates)>1):
-                #print("twin_candidate1: " + str(output[twin_candidates[0]]))    
-                #print("twin_candidate2: " + str(output[twin_candidates[1]]))
-                #if output[twin_candidates[0]] == output[twin_candidates[1]]: #before mentor helps
-                if sorted(output[twin_candidates[0]]) == sorted(output[twin_candidates[1]]):  #after mentor helps 
-                    twin_number = output[twin_candidates[0]]
-                    #print("Naked Twin exist! 1st num: " + str(twin_number[0]) + ", 2nd num: " + str(twin_number[1]))
-                    #print(unit)
-                    for peer in unit:
-                        if (peer not in twin_candidates):
-                            #print("before" + str(output[peer]))
-                            if (output[peer] in twin_number[0]):
-                                output[peer] = output[peer].replace(twin_number[0],"")
-                            if (output[peer] in twin_number[1]):
-                                output[peer] = output[peer].replace(twin_number[1],"")
-                            #print("after" + str(output[peer]))
-                            
-    #(2) Execute for every box & peer: Refered to the mentor's advice
-    twin_canditates = [box for box in output if len(output[box]) == 2]
-
-    naked_twins = [(twin_box, peer_box) for twin_box in twin_canditates for peer_box in peers[twin_box] \
-                    if sorted(output[twin_box]) == sorted(output[peer_box])]
-    #print("naked_twins")
-    #print(naked_twins)
-
-    for twins in naked_twins:
-        common_peers = set(peers[twins[0]]).intersection(peers[twins[1]])
-        #print("common_peers")
-        #print(common_peers)
-        #print("twins[0]")
-        #print(twins[0])
-        #print("peers[twin[0]]")
-        #print(peers[twins[0]])
-        #print("twins[1]")
-        #print(twins[1])
-        #print("peers[twin[1]]")
-        #print(peers[twins[1]])
-        #print("output[twins[0]]")
-        #print(output[twins[0]])       
-        for peer in common_peers:
-            for digit in output[twins[0]]:
-                output[peer] = output[peer].replace(digit,'')
+    processed = set()
+    record = recording()
+    for unit in unitlist:
+        pairs = {}
+        for box in unit:
+            if len(values[box]) == 2:
+                pairs.setdefault(frozenset(values[box]), []).append(box)
+        for twin_digits, twin_boxes in pairs.items():
+            for twins in combinations(twin_boxes, 2):
+                key = frozenset(twins)
+                if key in processed:
+                    continue  # twins sharing a row and a square are found twice
+                processed.add(key)
+                for peer in common_peers(*twins):
+                    for digit in twin_digits:
+                        if not record:
+                            output[peer] = output[peer].replace(digit, '')
+                        elif digit in output[peer]:
+                            assign_value(output, peer, output[peer].replace(digit, ''))
 
     return output
 
@@ -131,11 +121,15 @@ def eliminate(values):
     # TODO: Copy your code from the classroom to complete this function
     # I use the solution code from Lesson
     solved_values = [box for box in values.keys() if len(values[box]) == 1]
+    record = recording()
 
     for box in solved_values:
         digit = values[box]
         for peer in peers[box]:
-            values[peer] = values[peer].replace(digit,"")
+            if not record:
+                values[peer] = values[peer].replace(digit,"")
+            elif digit in values[peer]:
+                assign_value(values, peer, values[peer].replace(digit,""))
 
     return values
 
@@ -162,16 +156,74 @@ def only_choice(values):
     """
     # TODO: Copy your code from the classroom to complete this function
     # I use the solution code from Lesson
+    record = recording()
     for unit in unitlist:
-        for digit in '123456789':
+        for digit in digits:
             dplaces = [box for box in unit if digit in values[box]]
             if len(dplaces) == 1:
-                values[dplaces[0]] = digit
+                if record:
+                    assign_value(values, dplaces[0], digit)
+                else:
+                    values[dplaces[0]] = digit
+
+    return values
+
+
+# Units crossed by the intersection strategies: a square shares three boxes with
+# a row, a column or a diagonal
+line_units = row_units + column_units + [diag_units1, diag_units2]
+square_line_pairs = intersecting_pairs(square_units, line_units)
+line_square_pairs = intersecting_pairs(line_units, square_units)
+
+# The strategies reduce_puzzle can schedule, with their relative costs. Register
+# new strategies here (or on STRATEGIES at run time) to make them available.
+STRATEGIES = StrategyRegistry()
+STRATEGIES.register('eliminate', eliminate, cost=1)
+STRATEGIES.register('only_choice', only_choice, cost=1)
+STRATEGIES.register('naked_twins', naked_twins, cost=2)
+STRATEGIES.register('hidden_pairs', lambda values: hidden_subsets(values, unitlist, 2), cost=3)
+STRATEGIES.register('pointing_pairs', lambda values: locked_candidates(values, square_line_pairs), cost=3)
+STRATEGIES.register('box_line_reduction', lambda values: locked_candidates(values, line_square_pairs), cost=3)
+STRATEGIES.register('naked_triples', lambda values: naked_subsets(values, unitlist, 3), cost=4)
+STRATEGIES.register('hidden_triples', lambda values: hidden_subsets(values, unitlist, 3), cost=4)
+STRATEGIES.register('naked_quads', lambda values: naked_subsets(values, unitlist, 4), cost=5)
+STRATEGIES.register('x_wing', lambda values: x_wing(x_wing(values, row_units, column_units, digits),
+                                                    column_units, row_units, digits), cost=5)
+
+
+def _apply(strategy, values, stats, name=None):
+    """Run one strategy, recording its eliminations and run time in stats if given"""
+    if stats is None:
+        return strategy(values)
+    before = sum(len(v) for v in values.values())
+    start = perf_counter()
+    values = strategy(values)
+    elapsed = perf_counter() - start
+    stats.record(name or strategy.__name__, before - sum(len(v) for v in values.values()), elapsed)
+    return values
+
+
+def _reduce_scheduled(values, tiers, stats=None):
+    """Run the strategy tiers cheapest first, escalating only when a tier stalls
 
+    Each tier is repeated until it no longer removes candidates; the next (more
+    expensive) tier runs only then, and any progress it makes sends the schedule
+    back to the cheapest tier.
+    """
+    level = 0
+    while level < len(tiers):
+        before = sum(len(v) for v in values.values())
+        if stats is not None:
+            stats.rounds += 1
+        for strategy in tiers[level]:
+            values = _apply(strategy.func, values, stats, strategy.name)
+        if any(len(v) == 0 for v in values.values()):
+            return False
+        level = 0 if sum(len(v) for v in values.values()) < before else level + 1
     return values
 
 
-def reduce_puzzle(values):
+def reduce_puzzle(values, incremental=False, stats=None, strategies=None):
     """Reduce a Sudoku puzzle by repeatedly applying all constraint strategies
 
     Parameters
@@ -179,24 +231,50 @@ def reduce_puzzle(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    incremental(bool)
+        if True, reduce the puzzle with the work-queue propagation of the bitmask
+        engine, which only revisits the units of boxes whose candidates changed,
+        instead of sweeping every box and unit on each iteration
+
+    stats(SolverStats)
+        if given, record the rounds and the eliminations and time of each strategy
+
+    strategies(list)
+        if given, the names of the STRATEGIES to schedule by cost (cheapest tier
+        to a fixpoint first), or 'all' for every registered strategy; by default
+        eliminate, only choice and naked twins are applied in turn
+
     Returns
     -------
     dict or False
         The values dictionary after continued application of the constraint strategies
         no longer produces any changes, or False if the puzzle is unsolvable 
     """
+    if strategies is not None:
+        if incremental:
+            raise ValueError("strategies cannot be scheduled with incremental propagation")
+        return _reduce_scheduled(values, STRATEGIES.schedule(None if strategies == 'all' else strategies), stats)
+
+    if incremental:
+        cands = bitmask_solver.reduce_puzzle(bitmask_solver.values2cands(values), stats=stats)
+        if cands is False:
+            return False
+        return bitmask_solver.cands2values(cands)
+
     # TODO: Copy your code from the classroom and modify it to complete this function
     # I use the solution code from Lesson
     stalled = False
     while not stalled:
         # Check how many boxes have a determined value
         solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
+        if stats is not None:
+            stats.rounds += 1
         # Use the Eliminate Strategy
-        values = eliminate(values)
+        values = _apply(eliminate, values, stats)
         # Use the Only Choice Strategy
-        values = only_choice(values)
+        values = _apply(only_choice, values, stats)
         # Use the Naked Twins Strategy
-        values = naked_twins(values)
+        values = _apply(naked_twins, values, stats)
         # Check how many boxes have a determined value, to compare
         solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
         # If no new values were added, stop the loop.
@@ -207,7 +285,7 @@ def reduce_puzzle(values):
     return values
 
 
-def search(values):
+def search(values, stats=None, depth=0, strategies=None):
     """Apply depth first search to solve Sudoku puzzles in order to solve puzzles
     that cannot be solved by repeated reduction alone.
 
@@ -216,6 +294,16 @@ def search(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    stats(SolverStats)
+        if given, record the search nodes, depth and branches (and the
+        reduce_puzzle statistics of every node)
+
+    depth(int)
+        the depth of this call in the search tree
+
+    strategies(list)
+        the strategies reduce_puzzle schedules at every node (see reduce_puzzle)
+
     Returns
     -------
     dict or False
@@ -229,7 +317,9 @@ def search(values):
     # TODO: Copy your code from the classroom to complete this function
     # First, reduce the puzzle using the previous function
     # I use the solution code from Lesson
-    values = reduce_puzzle(values)
+    if stats is not None:
+        stats.visit(depth)
+    values = reduce_puzzle(values, stats=stats, strategies=strategies)
 
     if values is False:
         return False ## Failed earlier
@@ -240,12 +330,46 @@ def search(values):
     # Now use recurrence to solve each one of the resulting sudokus, and 
     for value in values[s]:
         new_sudoku = values.copy()
-        new_sudoku[s] = value
-        attempt = search(new_sudoku)
+        if recording():
+            record_values(new_sudoku)
+            assign_value(new_sudoku, s, value)
+        else:
+            new_sudoku[s] = value
+        if stats is not None:
+            stats.branches += 1
+        attempt = search(new_sudoku, stats, depth + 1, strategies)
         if attempt:
             return attempt
 
-def solve(grid):
+def _solve_dict(grid, stats=None, strategies=None):
+    values = grid2values(grid)
+    values = search(values, stats, strategies=strategies)
+    return values or False
+
+
+ENGINES = {
+    'dict': _solve_dict,
+    'bitmask': bitmask_solver.solve,
+    'dlx': dlx_solver.solve,
+}
+
+# Engines that can be built for any board layout (see board_solver())
+ENGINE_CLASSES = {
+    'bitmask': BitmaskSolver,
+    'dlx': DLXSolver,
+}
+
+
+@lru_cache()
+def board_solver(size=3, diagonal=True, engine='bitmask'):
+    """Return an engine instance for a (size**2 x size**2) board, built once per layout"""
+    if engine not in ENGINE_CLASSES:
+        raise ValueError("the {!r} engine only supports the 9x9 diagonal board".format(engine))
+    board = make_board(size, diagonal)
+    return ENGINE_CLASSES[engine](board.unitlist, board.boxes, board.digits)
+
+
+def solve(grid, engine='bitmask', diagonal=True, stats=None, strategies=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -255,21 +379,83 @@ def solve(grid):
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+    engine(string)
+        the name of the solver backend in ENGINES. 'bitmask' (the default) runs the
+        strategies over candidate bitmasks and converts the result back to a
+        dictionary; 'dict' runs search() above directly on the values dictionary;
+        'dlx' solves the equivalent exact cover problem with Dancing Links.
+
+    diagonal(bool)
+        whether the two main diagonals are units too.
+
+    stats(SolverStats)
+        if given, collect per-strategy eliminations and timings and search
+        statistics into it (see stats.py)
+
+    strategies(list)
+        names of STRATEGIES (or 'all') for the 'dict' engine to schedule by cost
+        at every search node, e.g. ['eliminate', 'only_choice', 'hidden_pairs']
+
+    Grids with 256 or 625 characters are solved as 16x16 or 25x25 boards (see
+    utils.make_board for the box names and digit symbols); the board size is
+    inferred from the length of the grid.
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
+
+    Raises
+    ------
+    ValueError
+        if the length of the grid is not a board size, or the grid has a
+        character other than '.' and the digits of the board
     """
-    values = grid2values(grid)
-    values = search(values)
-    return values
+    size = board_size(grid)
+    check_grid(grid, size)
+    if strategies is not None:
+        if engine != 'dict' or size != 3 or not diagonal:
+            raise ValueError("strategies can only be scheduled by the 'dict' engine on the 9x9 diagonal board")
+        return _solve_dict(grid, stats=stats, strategies=strategies)
+    if size == 3 and diagonal:
+        return ENGINES[engine](grid, stats=stats)
+    return board_solver(size, diagonal, engine).solve(grid, stats=stats)
+
+
+def count_solutions(grid, limit=2, diagonal=True):
+    """Count the solutions of a Sudoku puzzle, stopping once limit is reached
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    limit(int)
+        the maximum number of solutions to count; the default of 2 answers
+        whether the puzzle has a unique solution
+
+    diagonal(bool)
+        whether the two main diagonals are units too
+
+    Returns
+    -------
+    int
+        The number of solutions found, at most limit
+    """
+    size = board_size(grid)
+    check_grid(grid, size)
+    solver = dlx_solver if size == 3 and diagonal else board_solver(size, diagonal, 'dlx')
+    return solver.count_solutions(grid, limit)
 
 
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     #diag_sudoku_grid = '..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..'
     display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    # only the 'dict' engine updates the board through assign_value, so it is the
+    # one that leaves a trace to replay
+    with HistoryRecorder() as history:
+        result = solve(diag_sudoku_grid, engine='dict')
     display(result)
 
     try:
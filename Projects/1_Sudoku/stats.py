@@ -0,0 +1,111 @@
+"""Opt-in instrumentation for the Sudoku solvers.
+
+Pass a SolverStats instance as the ``stats`` argument of solution.solve (or of
+reduce_puzzle/search) to record how many candidates each strategy removed, the
+time spent in each strategy, the number of reduction rounds, and the size of the
+search tree. Without a stats object the solvers skip all of the bookkeeping.
+
+    stats = SolverStats()
+    solve(grid, stats=stats)
+    print(stats.to_json())
+
+SolverStats.aggregate() sums the statistics of many puzzles into one object for
+a whole batch.
+"""
+import json
+
+
+class SolverStats:
+    """Counters and timings collected while solving one puzzle (or a batch)
+
+    Attributes
+    ----------
+    strategies(dict)
+        for each strategy name, a dict with the number of calls, the number of
+        candidates it eliminated and the time spent in it (in seconds)
+
+    rounds(int)
+        reduction rounds; for the work-queue propagation of the bitmask engine
+        this is the number of propagation calls
+
+    nodes(int)
+        search nodes visited (including the root)
+
+    max_depth(int)
+        the deepest level reached by the search (the root is depth 0)
+
+    branches(int)
+        branches tried, i.e. digits tentatively assigned by the search
+
+    puzzles(int)
+        the number of puzzles these statistics cover
+    """
+    def __init__(self):
+        self.strategies = {}
+        self.rounds = 0
+        self.nodes = 0
+        self.max_depth = 0
+        self.branches = 0
+        self.puzzles = 1
+
+    def record(self, strategy, eliminated, elapsed):
+        """Add one call of a strategy that eliminated some candidates in elapsed seconds"""
+        entry = self.strategies.get(strategy)
+        if entry is None:
+            entry = self.strategies[strategy] = {'calls': 0, 'eliminated': 0, 'time': 0.0}
+        entry['calls'] += 1
+        entry['eliminated'] += eliminated
+        entry['time'] += elapsed
+
+    def visit(self, depth):
+        """Count a search node at the given depth"""
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def merge(self, other):
+        """Add the statistics of other into this object"""
+        for strategy, entry in other.strategies.items():
+            mine = self.strategies.setdefault(strategy, {'calls': 0, 'eliminated': 0, 'time': 0.0})
+            for key, value in entry.items():
+                mine[key] += value
+        self.rounds += other.rounds
+        self.nodes += other.nodes
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.branches += other.branches
+        self.puzzles += other.puzzles
+        return self
+
+    @classmethod
+    def aggregate(cls, stats):
+        """Return the sum of an iterable of SolverStats (or of their dicts)"""
+        total = cls()
+        total.puzzles = 0
+        for item in stats:
+            total.merge(cls.from_dict(item) if isinstance(item, dict) else item)
+        return total
+
+    def to_dict(self):
+        return {
+            'puzzles': self.puzzles,
+            'rounds': self.rounds,
+            'nodes': self.nodes,
+            'max_depth': self.max_depth,
+            'branches': self.branches,
+            'strategies': {name: dict(entry) for name, entry in self.strategies.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for key in ('puzzles', 'rounds', 'nodes', 'max_depth', 'branches'):
+            setattr(stats, key, data[key])
+        stats.strategies = {name: dict(entry) for name, entry in data['strategies'].items()}
+        return stats
+
+    def to_json(self, **kwargs):
+        """Serialize the statistics as a JSON string (kwargs go to json.dumps)"""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __repr__(self):
+        return 'SolverStats({})'.format(self.to_json(sort_keys=True))
@@ -0,0 +1,250 @@
+"""Additional inference strategies and a cost-aware strategy registry.
+
+The strategies here work on the values dictionary used by solution.py and take
+the units they need as arguments, so they apply to any unit configuration:
+
+    naked_subsets          naked triples/quads: n boxes of a unit holding only n
+                           digits between them take those digits from the rest
+                           of the unit
+    hidden_subsets         hidden pairs/triples: n digits confined to n boxes of a
+                           unit leave no room for other digits in those boxes
+    locked_candidates      pointing pairs and box-line reduction: a digit confined
+                           to the intersection of two units cannot appear in the
+                           rest of the second unit
+    x_wing                 a digit confined to the same two cover units in two
+                           base units (e.g. the same two columns in two rows)
+                           cannot appear elsewhere in those cover units
+
+A StrategyRegistry maps strategy names to functions and relative costs. Its
+schedule() groups strategies into tiers of equal cost; reduce_puzzle in
+solution.py runs the cheapest tier to a fixpoint before trying the next one,
+and returns to the cheapest tier whenever an expensive strategy makes progress.
+"""
+from collections import namedtuple
+from itertools import combinations
+
+from utils import assign_value, recording
+
+
+Strategy = namedtuple('Strategy', ['name', 'func', 'cost'])
+
+
+class StrategyRegistry:
+    """A named collection of strategies ordered by cost
+
+    Each strategy is a function that takes a values dictionary and returns the
+    (possibly same, possibly modified in place) values dictionary.
+    """
+    def __init__(self):
+        self._strategies = {}
+
+    def register(self, name, func, cost):
+        """Add (or replace) a strategy with the given relative cost"""
+        self._strategies[name] = Strategy(name, func, cost)
+        return func
+
+    def __contains__(self, name):
+        return name in self._strategies
+
+    def __getitem__(self, name):
+        return self._strategies[name]
+
+    def names(self):
+        """Return the registered strategy names, cheapest first"""
+        return [s.name for s in sorted(self._strategies.values(), key=lambda s: s.cost)]
+
+    def schedule(self, names=None):
+        """Group the named strategies (or all of them) into tiers of increasing cost
+
+        Returns
+        -------
+        list
+            a list of lists of Strategy; every strategy in a tier has the same cost
+        """
+        if names is None:
+            names = self.names()
+        tiers = {}
+        for name in names:
+            strategy = self._strategies[name]
+            tiers.setdefault(strategy.cost, []).append(strategy)
+        return [tiers[cost] for cost in sorted(tiers)]
+
+
+def naked_subsets(values, unitlist, size):
+    """Apply the naked triples (size 3) or naked quads (size 4) strategy
+
+    If n boxes of a unit hold no digits other than the same n digits between
+    them, then those digits cannot go anywhere else in the unit. (Naked pairs
+    are covered by the naked twins strategy of solution.py.)
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    unitlist(list)
+        the units to search for naked subsets
+
+    size(int)
+        the number of boxes (and digits) in a subset
+
+    Returns
+    -------
+    dict
+        The values dictionary with the subset digits eliminated from the rest of each unit
+    """
+    record = recording()
+    for unit in unitlist:
+        small = [box for box in unit if 2 <= len(values[box]) <= size]
+        for subset in combinations(small, size):
+            subset_digits = set(''.join(values[box] for box in subset))
+            if len(subset_digits) != size:
+                continue
+            for box in unit:
+                if box not in subset:
+                    for digit in subset_digits:
+                        if not record:
+                            values[box] = values[box].replace(digit, '')
+                        elif digit in values[box]:
+                            assign_value(values, box, values[box].replace(digit, ''))
+    return values
+
+
+def hidden_subsets(values, unitlist, size):
+    """Apply the hidden pairs (size 2) or hidden triples (size 3) strategy
+
+    If the only places for n digits in a unit are n boxes, then those boxes
+    cannot hold any other digit.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    unitlist(list)
+        the units to search for hidden subsets
+
+    size(int)
+        the number of digits (and boxes) in a subset
+
+    Returns
+    -------
+    dict
+        The values dictionary with the other digits removed from hidden subsets
+    """
+    record = recording()
+    for unit in unitlist:
+        places = {}
+        for box in unit:
+            if len(values[box]) > 1:
+                for digit in values[box]:
+                    places.setdefault(digit, set()).add(box)
+        solved = {values[box] for box in unit if len(values[box]) == 1}
+        candidates = [d for d, p in places.items() if d not in solved and 2 <= len(p) <= size]
+        for subset in combinations(sorted(candidates), size):
+            boxes = set().union(*(places[d] for d in subset))
+            if len(boxes) != size:
+                continue
+            for box in boxes:
+                kept = ''.join(d for d in values[box] if d in subset)
+                if record:
+                    assign_value(values, box, kept)
+                elif kept != values[box]:
+                    values[box] = kept
+    return values
+
+
+def locked_candidates(values, unit_pairs):
+    """Apply the pointing pairs and box-line reduction strategies
+
+    For each pair of units (A, B), if every place for a digit in A lies in the
+    intersection of A and B, then the digit can be eliminated from the boxes of
+    B outside of A. With A a square and B a row or column this is "pointing
+    pairs"; with A a row or column and B a square it is "box-line reduction".
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    unit_pairs(list)
+        (A, B, intersection) triples of units sharing two or more boxes
+
+    Returns
+    -------
+    dict
+        The values dictionary with the locked digits eliminated
+    """
+    record = recording()
+    for unit_a, unit_b, shared in unit_pairs:
+        inside = set(''.join(values[box] for box in shared))
+        outside = set(''.join(values[box] for box in unit_a if box not in shared))
+        for digit in inside - outside:
+            if any(values[box] == digit for box in shared):
+                continue
+            for box in unit_b:
+                if box not in shared and digit in values[box]:
+                    if record:
+                        assign_value(values, box, values[box].replace(digit, ''))
+                    else:
+                        values[box] = values[box].replace(digit, '')
+    return values
+
+
+def intersecting_pairs(units_a, units_b):
+    """Return the (A, B, intersection) triples of units sharing two or more boxes"""
+    pairs = []
+    for unit_a in units_a:
+        members = set(unit_a)
+        for unit_b in units_b:
+            shared = [box for box in unit_b if box in members]
+            if 2 <= len(shared) < len(unit_a):
+                pairs.append((unit_a, unit_b, shared))
+    return pairs
+
+
+def x_wing(values, base_units, cover_units, digits):
+    """Apply the X-wing strategy
+
+    If a digit can only go in the same two cover units (e.g. columns) within two
+    different base units (e.g. rows), then one of the two diagonal corners holds
+    it in each cover unit, and it can be eliminated from the rest of both cover
+    units.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    base_units(list), cover_units(list)
+        two families of disjoint units covering the board, such as the rows and
+        the columns (call again with the roles swapped for the other direction)
+
+    digits(string)
+        the digits of the board
+
+    Returns
+    -------
+    dict
+        The values dictionary with the X-wing digits eliminated
+    """
+    record = recording()
+    cover_of = {box: c for c, unit in enumerate(cover_units) for box in unit}
+    for digit in digits:
+        wings = {}
+        for b, unit in enumerate(base_units):
+            places = [box for box in unit if digit in values[box]]
+            if len(places) == 2 and all(len(values[box]) > 1 for box in places):
+                wings.setdefault(tuple(sorted(cover_of[box] for box in places)), []).append(b)
+        for covers, bases in wings.items():
+            if len(bases) != 2:
+                continue
+            corners = {box for b in bases for box in base_units[b]}
+            for c in covers:
+                for box in cover_units[c]:
+                    if box not in corners and digit in values[box]:
+                        if record:
+                            assign_value(values, box, values[box].replace(digit, ''))
+                        else:
+                            values[box] = values[box].replace(digit, '')
+    return values
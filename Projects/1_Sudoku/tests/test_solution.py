@@ -3,8 +3,22 @@ tests does not guarantee that your solution is correct. The Project Asssistant t
 many additional test cases that you must also pass to complete the project. You should write your
 own additional test cases to cover any failed tests shown in the Project Assistant feedback.
 """
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
 import unittest
+from unittest import mock
+import batch
+import benchmark
+import bitboard
+import generator
 import solution
+import strategies
+import topology
+import utils
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -99,5 +113,333 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+    def test_solve_dict_engine(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine='dict'), self.solved_diag_sudoku)
+
+    def test_solve_dlx_engine(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine='dlx'), self.solved_diag_sudoku)
+        self.assertFalse(solution.solve('22' + '.' * 79, engine='dlx'))
+
+    def test_invalid_grid(self):
+        for grid in ['x' * 81, '0' * 81, '2' + '-' * 80]:
+            for engine in sorted(solution.ENGINES):
+                with self.assertRaises(ValueError):
+                    solution.solve(grid, engine=engine)
+            with self.assertRaises(ValueError):
+                solution.dlx_solver.solve(grid)
+            with self.assertRaises(ValueError):
+                solution.count_solutions(grid)
+
+    def test_count_solutions(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5), 5)
+        self.assertEqual(solution.count_solutions('22' + '.' * 79), 0)
+
+
+class TestStrategies(unittest.TestCase):
+    def test_hidden_pairs(self):
+        values = solution.grid2values('.' * 81)
+        for box in ['A3', 'A4', 'A5', 'A6', 'A7', 'A8', 'A9']:
+            values[box] = '3456789'
+        solution.STRATEGIES['hidden_pairs'].func(values)
+        self.assertEqual(values['A1'], '12')
+        self.assertEqual(values['A2'], '12')
+        self.assertEqual(values['A3'], '3456789')
+
+    def test_naked_triples(self):
+        values = solution.grid2values('.' * 81)
+        values.update({'A1': '12', 'A2': '23', 'A3': '13'})
+        solution.STRATEGIES['naked_triples'].func(values)
+        self.assertEqual(values['A4'], '456789')
+        self.assertEqual(values['B2'], '456789')
+        self.assertEqual(values['D2'], '123456789')
+        self.assertEqual(values['A1'], '12')
+
+    def test_pointing_pairs(self):
+        values = solution.grid2values('.' * 81)
+        for box in ['B1', 'B2', 'B3', 'C1', 'C2', 'C3']:
+            values[box] = '23456789'
+        solution.STRATEGIES['pointing_pairs'].func(values)
+        self.assertEqual(values['A4'], '23456789')
+        self.assertEqual(values['A1'], '123456789')
+        self.assertEqual(values['D1'], '123456789')
+
+    def test_x_wing(self):
+        values = solution.grid2values('.' * 81)
+        for row in 'AE':
+            for col in '2345678':
+                values[row + col] = '23456789'
+        solution.STRATEGIES['x_wing'].func(values)
+        self.assertEqual(values['C1'], '23456789')
+        self.assertEqual(values['C9'], '23456789')
+        self.assertEqual(values['C5'], '123456789')
+
+    def test_schedule_by_cost(self):
+        tiers = solution.STRATEGIES.schedule(['x_wing', 'only_choice', 'hidden_pairs', 'eliminate'])
+        self.assertEqual([[s.name for s in tier] for tier in tiers],
+                         [['only_choice', 'eliminate'], ['hidden_pairs'], ['x_wing']])
+
+    def test_fewer_branches_with_all_strategies(self):
+        hard_grid = '.....8.............98...1....45..6...........9...61.2.......7.....4...63...98.45.'
+        default, scheduled = solution.SolverStats(), solution.SolverStats()
+        expected = solution.solve(hard_grid, engine='dict', stats=default)
+        self.assertEqual(solution.solve(hard_grid, engine='dict', stats=scheduled, strategies='all'), expected)
+        self.assertGreater(default.branches, 0)
+        self.assertLess(scheduled.branches, default.branches)
+
+    def test_solve_with_all_strategies(self):
+        stats = solution.SolverStats()
+        values = solution.solve(TestDiagonalSudoku.diagonal_grid, engine='dict', stats=stats,
+                                strategies='all')
+        self.assertEqual(values, TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertIn('x_wing', stats.strategies)
+        with self.assertRaises(ValueError):
+            solution.solve(TestDiagonalSudoku.diagonal_grid, strategies='all')
+
+
+class TestLargeBoards(unittest.TestCase):
+    def assertSolves(self, size, diagonal, engine):
+        board = solution.make_board(size, diagonal)
+        grid = benchmark.make_puzzles(size, 1, 0.5, diagonal, seed=1)[0]
+        values = solution.solve(grid, engine=engine, diagonal=diagonal)
+        for unit in board.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), sorted(board.digits))
+        for box, val in zip(board.boxes, grid):
+            if val != '.':
+                self.assertEqual(values[box], val)
+
+    def test_make_board(self):
+        board = solution.make_board(3)
+        self.assertEqual(board.unitlist, solution.unitlist)
+        self.assertEqual(board.boxes, solution.boxes)
+        self.assertEqual(len(solution.make_board(4, diagonal=False).unitlist), 48)
+
+    def test_solve_16x16(self):
+        for engine in ('bitmask', 'dlx'):
+            self.assertSolves(4, True, engine)
+
+    def test_solve_25x25(self):
+        self.assertSolves(5, False, 'bitmask')
+
+
+class TestHistoryRecorder(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertIsNone(utils.recorder)
+        values = solution.assign_value({'A1': '123'}, 'A1', '1')
+        self.assertEqual(values, {'A1': '1'})
+
+    def test_no_assign_value_calls_when_disabled(self):
+        calls = []
+
+        def counting_assign_value(values, box, value):
+            calls.append(box)
+            values[box] = value
+            return values
+
+        with mock.patch.object(solution, 'assign_value', counting_assign_value), \
+                mock.patch.object(strategies, 'assign_value', counting_assign_value):
+            result = solution.solve(TestDiagonalSudoku.diagonal_grid, engine='dict', strategies='all')
+        self.assertEqual(result, TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(calls, [])
+
+    def test_bounded_replay(self):
+        values = solution.grid2values('.' * 81)
+        with solution.HistoryRecorder(maxlen=2) as history:
+            self.assertIs(utils.recorder, history)
+            for box, value in [('A1', '12'), ('A2', '3'), ('A1', '2'), ('A1', '2')]:
+                solution.assign_value(values, box, value)
+        self.assertIsNone(utils.recorder)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history.evicted, 1)
+        self.assertEqual(solution.reconstruct(values, history), [('A2', '3'), ('A1', '2')])
+
+    def test_replay_follows_search(self):
+        values = solution.grid2values(TestDiagonalSudoku.diagonal_grid)
+        with solution.HistoryRecorder() as history:
+            result = solution.solve(TestDiagonalSudoku.diagonal_grid, engine='dict')
+        for box, value in history.replay():
+            values[box] = value
+        self.assertEqual(values, result)
+
+    def test_replay_follows_scheduled_strategies(self):
+        grid = generator.make_puzzle(generator.random.Random(7), 'hard')
+        values = solution.grid2values(grid)
+        with solution.HistoryRecorder() as history:
+            result = solution.solve(grid, engine='dict', strategies='all')
+        for box, value in history.replay():
+            values[box] = value
+        self.assertEqual(values, result)
+
+
+@unittest.skipIf(importlib.util.find_spec('pygame') is None, "pygame is not installed")
+class TestReplayRenderer(unittest.TestCase):
+    def test_headless_frames(self):
+        import PySudoku
+        values = solution.grid2values(TestDiagonalSudoku.diagonal_grid)
+        assignments = [('A2', '1'), ('A3', '3'), ('A4', '4')]
+        with tempfile.TemporaryDirectory() as tmp:
+            count = PySudoku.save_frames(PySudoku.render(values, assignments, every=2), tmp)
+            self.assertEqual(count, 3)
+            self.assertEqual(sorted(os.listdir(tmp)), ['frame_00000.png', 'frame_00001.png', 'frame_00002.png'])
+
+
+class TestTopology(unittest.TestCase):
+    def test_tables_match_units_and_peers(self):
+        topo = topology.compile_topology(solution.unitlist, solution.boxes, cache_dir=None)
+        for i, box in enumerate(topo.boxes):
+            self.assertEqual({topo.boxes[p] for p in topo.peers[i]}, solution.peers[box])
+            self.assertEqual([[topo.boxes[j] for j in topo.units[u]] for u in topo.box_units[i]],
+                             solution.units[box])
+
+    def test_disk_cache(self):
+        unitlist = solution.unitlist[:-1]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            topo = topology.compile_topology(unitlist, solution.boxes, cache_dir=cache_dir)
+            topology._compiled.clear()
+            [name] = os.listdir(cache_dir)
+            with open(os.path.join(cache_dir, name)) as f:
+                self.assertEqual(json.load(f)['peers'], [list(p) for p in topo.peers])
+            loaded = topology.compile_topology(unitlist, solution.boxes, cache_dir=cache_dir)
+            self.assertIsNot(loaded, topo)
+            self.assertEqual(loaded.peers, topo.peers)
+            self.assertEqual(loaded.box_units, topo.box_units)
+
+
+class TestBitmaskSolver(unittest.TestCase):
+    solver = solution.bitmask_solver
+
+    def test_round_trip(self):
+        values = TestNakedTwins.before_naked_twins_1
+        self.assertEqual(self.solver.cands2values(self.solver.values2cands(values)), values)
+
+    def test_naked_twins(self):
+        for before, possible in [(TestNakedTwins.before_naked_twins_1, TestNakedTwins.possible_solutions_1),
+                                 (TestNakedTwins.before_naked_twins_2, TestNakedTwins.possible_solutions_2)]:
+            cands = self.solver.naked_twins(self.solver.values2cands(before))
+            self.assertIn(self.solver.cands2values(cands), possible)
+
+    def test_unsolvable(self):
+        self.assertFalse(self.solver.solve('22' + '.' * 79))
+
+    def test_propagate_raises_on_empty_box(self):
+        cands = self.solver.grid2cands('12.' + '.' * 78)
+        cands[2] = self.solver.bit['1'] | self.solver.bit['2']
+        with self.assertRaises(bitboard.Contradiction):
+            self.solver.propagate(cands)
+
+    def test_failed_search_restores_board(self):
+        cands = self.solver.grid2cands('2' + '.' * 79 + '2')
+        before = list(cands)
+        self.assertFalse(self.solver.search(cands))
+        self.assertEqual(cands, before)
+
+    def test_incremental_reduce_puzzle(self):
+        values = solution.grid2values(TestDiagonalSudoku.diagonal_grid)
+        reduced = solution.reduce_puzzle(dict(values), incremental=True)
+        full = solution.reduce_puzzle(dict(values))
+        for box, digits in reduced.items():
+            self.assertTrue(set(digits) <= set(full[box]))
+
+try:
+    import vectorized
+except ImportError:
+    vectorized = None
+
+
+@unittest.skipIf(vectorized is None, "numpy is not installed")
+class TestVectorizedSolver(unittest.TestCase):
+    def test_solve_batch(self):
+        solver = vectorized.VectorizedSolver(solution.unitlist)
+        grids = [TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79,
+                 solution.values2grid(TestDiagonalSudoku.solved_diag_sudoku)]
+        self.assertEqual(solver.solve(grids, chunksize=2),
+                         [TestDiagonalSudoku.solved_diag_sudoku, False, TestDiagonalSudoku.solved_diag_sudoku])
+
+    def test_naked_twins(self):
+        solver = vectorized.VectorizedSolver(solution.unitlist)
+        before = TestNakedTwins.before_naked_twins_2
+        cands = solver.grids2tensor(['.' * 81])
+        for b, box in enumerate(solver.boxes):
+            cands[0, b] = [d in before[box] for d in solver.digits]
+        after, dead = solver.naked_twins(cands)
+        self.assertFalse(dead[0])
+        values = solver.fallback.cands2values(solver.tensor2cands(after[0]))
+        self.assertEqual((values['C5'], values['C6']), ('79', '79'))
+
+
+class TestSolverStats(unittest.TestCase):
+    def test_engines_record_stats(self):
+        for engine in ('dict', 'bitmask'):
+            stats = solution.SolverStats()
+            solution.solve(TestDiagonalSudoku.diagonal_grid, engine=engine, stats=stats)
+            self.assertGreater(stats.rounds, 0)
+            self.assertGreaterEqual(stats.nodes, 1)
+            self.assertEqual(set(stats.strategies), {'eliminate', 'only_choice', 'naked_twins'})
+            # this grid is solved by reduction alone, so every empty box loses
+            # all but one of its 9 candidates to the strategies
+            self.assertEqual(stats.branches, 0)
+            empty = TestDiagonalSudoku.diagonal_grid.count('.')
+            removed = sum(entry['eliminated'] for entry in stats.strategies.values())
+            self.assertEqual(removed, 8 * empty)
+
+    def test_aggregate_and_json(self):
+        results = list(batch.solve_many(TestSolveMany.grids, workers=1, with_stats=True))
+        total = solution.SolverStats.aggregate(stats for _, stats in results)
+        self.assertEqual(total.puzzles, 3)
+        self.assertEqual(total.nodes, sum(stats.nodes for _, stats in results))
+        restored = solution.SolverStats.aggregate([json.loads(results[0][1].to_json())])
+        self.assertEqual(restored.to_dict(), results[0][1].to_dict())
+
+
+class TestSolveMany(unittest.TestCase):
+    grids = [TestDiagonalSudoku.diagonal_grid, '22' + '.' * 79, TestDiagonalSudoku.diagonal_grid]
+
+    def test_results_in_input_order(self):
+        for workers in (1, 2):
+            results = list(batch.solve_many(iter(self.grids), workers=workers, chunksize=1))
+            self.assertEqual(results, [TestDiagonalSudoku.solved_diag_sudoku, False,
+                                       TestDiagonalSudoku.solved_diag_sudoku])
+
+    def test_bounded_read_ahead(self):
+        consumed = []
+
+        def grids():
+            for grid in self.grids * 20:
+                consumed.append(grid)
+                yield grid
+
+        results = batch.solve_many(grids(), workers=2, chunksize=1)
+        self.assertEqual(next(results), TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertLessEqual(len(consumed), 2 * 2 + 1)
+        results.close()
+
+    def test_malformed_line(self):
+        bad_grid = 'x' + '.' * 80
+        for engine in sorted(solution.ENGINES):
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                self.assertEqual(batch._solve_line('123', engine=engine), '')
+                self.assertEqual(batch._solve_line(bad_grid, engine=engine), '')
+            self.assertEqual(err.getvalue().count('skipping invalid puzzle'), 2)
+
+    def test_malformed_grid_does_not_end_stream(self):
+        grids = [TestDiagonalSudoku.diagonal_grid, '0' * 81, TestDiagonalSudoku.diagonal_grid]
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = list(batch.solve_many(grids, workers=1))
+        self.assertEqual(results, [TestDiagonalSudoku.solved_diag_sudoku, False,
+                                   TestDiagonalSudoku.solved_diag_sudoku])
+
+
+class TestGenerator(unittest.TestCase):
+    def test_unique_puzzles_of_target_difficulty(self):
+        for difficulty in ('easy', 'hard'):
+            for grid in generator.generate(2, difficulty, seed=1, workers=1):
+                self.assertEqual(solution.count_solutions(grid), 1)
+                self.assertEqual(generator.grade(grid), difficulty)
+
+    def test_reproducible_across_workers(self):
+        self.assertEqual(list(generator.generate(2, 'easy', seed=3, workers=1)),
+                         list(generator.generate(2, 'easy', seed=3, workers=2, chunksize=1)))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,148 @@
+"""Compiled box/unit/peer tables for a Sudoku unit configuration.
+
+The engines in this project work on box indices instead of box names. A
+Topology holds every index table they need (units, per-box unit membership,
+peers), and compile_topology() builds it once per unit configuration. The
+result is cached in memory and can also be saved to disk as JSON under a key
+derived from the boxes and the unitlist, so large or irregular boards (16x16,
+25x25, extra regions) do not pay the compilation cost at every start.
+
+The disk cache is opt-in: it is used only when $SUDOKU_CACHE_DIR is set (or a
+cache_dir is passed to compile_topology()). The files hold plain lists of box
+names and indices, so loading one never runs code.
+"""
+import hashlib
+import json
+import os
+
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.environ.get('SUDOKU_CACHE_DIR') or None
+
+_compiled = {}
+
+
+class Topology:
+    """Index tables for one unit configuration
+
+    Attributes
+    ----------
+    boxes(tuple)
+        the box names; a box is identified by its position in this tuple
+
+    index(dict)
+        a mapping from box name to box index
+
+    units(tuple)
+        for each unit, a tuple of the indices of its boxes
+
+    box_units(tuple)
+        for each box, a tuple of the indices of the units it belongs to
+
+    peers(tuple)
+        for each box, a sorted tuple of the indices of its peers
+
+    peer_sets(tuple)
+        for each box, a frozenset of the indices of its peers
+    """
+    def __init__(self, boxes, units, box_units, peers):
+        self.boxes = boxes
+        self.index = {box: i for i, box in enumerate(boxes)}
+        self.units = units
+        self.box_units = box_units
+        self.peers = peers
+        self.peer_sets = tuple(frozenset(p) for p in peers)
+
+    @classmethod
+    def build(cls, unitlist, boxes):
+        """Compile the index tables in a single pass over the unitlist"""
+        boxes = tuple(boxes)
+        index = {box: i for i, box in enumerate(boxes)}
+        units = tuple(tuple(index[box] for box in unit) for unit in unitlist)
+        box_units = [[] for _ in boxes]
+        peer_sets = [set() for _ in boxes]
+        for u, unit in enumerate(units):
+            for i in unit:
+                box_units[i].append(u)
+                peer_sets[i].update(unit)
+        for i, peer_set in enumerate(peer_sets):
+            peer_set.discard(i)
+        peers = tuple(tuple(sorted(peer_set)) for peer_set in peer_sets)
+        return cls(boxes, units, tuple(map(tuple, box_units)), peers)
+
+    def __getstate__(self):
+        return (self.boxes, self.units, self.box_units, self.peers)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def to_dict(self):
+        return {
+            'version': CACHE_VERSION,
+            'boxes': list(self.boxes),
+            'units': self.units,
+            'box_units': self.box_units,
+            'peers': self.peers,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data['version'] != CACHE_VERSION:
+            raise ValueError("unsupported topology cache version {!r}".format(data['version']))
+        return cls(tuple(data['boxes']), tuple(map(tuple, data['units'])),
+                   tuple(map(tuple, data['box_units'])), tuple(map(tuple, data['peers'])))
+
+
+def topology_key(unitlist, boxes):
+    """Return a hex digest identifying a unit configuration"""
+    digest = hashlib.sha1(str(CACHE_VERSION).encode())
+    digest.update(repr(list(boxes)).encode())
+    digest.update(repr([list(unit) for unit in unitlist]).encode())
+    return digest.hexdigest()
+
+
+def compile_topology(unitlist, boxes, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the Topology for a unit configuration, compiling it at most once
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    cache_dir(str)
+        the directory of the on-disk cache, or None (the default unless
+        $SUDOKU_CACHE_DIR is set) to keep the cache in memory only
+
+    Returns
+    -------
+    Topology
+    """
+    key = topology_key(unitlist, boxes)
+    topology = _compiled.get(key)
+    if topology is not None:
+        return topology
+
+    path = os.path.join(cache_dir, 'topology-{}.json'.format(key)) if cache_dir else None
+    if path:
+        try:
+            with open(path) as f:
+                topology = Topology.from_dict(json.load(f))
+        except (OSError, KeyError, TypeError, ValueError):
+            topology = None
+    if topology is None:
+        topology = Topology.build(unitlist, boxes)
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+                with open(tmp_path, 'w') as f:
+                    json.dump(topology.to_dict(), f)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # the disk cache is an optimization only
+
+    _compiled[key] = topology
+    return topology
@@ -1,11 +1,18 @@
 
-from collections import defaultdict
+from array import array
+from collections import defaultdict, namedtuple
 
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
+digits = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
+recorder = None  # the active HistoryRecorder, if any (see assign_value)
+
+# Symbols for the digits of boards up to 25x25 (box size 5)
+DIGIT_SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+
+Board = namedtuple('Board', ['size', 'rows', 'cols', 'digits', 'boxes', 'unitlist'])
 
 
 def extract_units(unitlist, boxes):
@@ -28,10 +35,12 @@ def extract_units(unitlist, boxes):
     # the value for keys that aren't in the dictionary are initialized as an empty list
     units = defaultdict(list)
     for current_box in boxes:
-        for unit in unitlist:
-            if current_box in unit:
-                # defaultdict avoids this raising a KeyError when new keys are added
-                units[current_box].append(unit)
+        units[current_box]  # every box gets a key, even if it belongs to no unit
+    # a single pass over the units appends them to each member box in unitlist order
+    for unit in unitlist:
+        for current_box in unit:
+            # defaultdict avoids this raising a KeyError when new keys are added
+            units[current_box].append(unit)
     return units
 
 
@@ -66,10 +75,124 @@ def extract_peers(units, boxes):
     return peers
 
 
+class HistoryRecorder:
+    """Record the changes made by assign_value in a compact, bounded trace
+
+    Each change is stored as a single integer packing the index of the box and
+    the digits that changed (the XOR of the old and new candidate bitmasks). When
+    maxlen is set, the trace keeps only the most recent changes: the oldest one is
+    folded into a per-box base state instead, so the retained steps can still be
+    replayed and memory never grows past maxlen steps plus one mask per box.
+
+    Use the recorder as a context manager to make it the active recorder:
+
+        with HistoryRecorder(maxlen=10000) as history:
+            result = solve(grid)
+        assignments = reconstruct(result, history)
+
+    Parameters
+    ----------
+    maxlen(int)
+        the maximum number of changes to keep, or None to keep all of them
+
+    boxes(list), digits(string)
+        the boxes and digit symbols of the board (see make_board for larger boards)
+    """
+    def __init__(self, maxlen=None, boxes=boxes, digits=digits):
+        self.maxlen = maxlen
+        self.boxes = list(boxes)
+        self.digits = digits
+        self.index = {box: i for i, box in enumerate(self.boxes)}
+        self.bit = {d: 1 << k for k, d in enumerate(digits)}
+        self.shift = len(digits)
+        self.evicted = 0
+        self._base = {}  # box index -> mask before the oldest retained step
+        self._state = {}  # box index -> mask after the newest step
+        self._steps = array('Q')
+        self._start = 0
+        self._previous = None
+
+    def __enter__(self):
+        global recorder
+        self._previous, recorder = recorder, self
+        return self
+
+    def __exit__(self, *exc_info):
+        global recorder
+        recorder, self._previous = self._previous, None
+
+    def __len__(self):
+        return len(self._steps)
+
+    def _mask(self, value):
+        mask = 0
+        for d in value:
+            mask |= self.bit[d]
+        return mask
+
+    def record(self, box, old, new):
+        """Record that box changed from the candidates old to the candidates new
+
+        The change is stored relative to the last recorded value of the box, so
+        the trace stays consistent when the caller switches between copies of
+        the board (see sync).
+        """
+        i = self.index[box]
+        if i not in self._state:
+            self._state[i] = self._base[i] = self._mask(old)
+        mask = self._mask(new)
+        step = (i << self.shift) | (self._state[i] ^ mask)
+        self._state[i] = mask
+        if self.maxlen is None or len(self._steps) < self.maxlen:
+            self._steps.append(step)
+        elif self.maxlen > 0:
+            self._evict(self._steps[self._start])
+            self._steps[self._start] = step
+            self._start = (self._start + 1) % self.maxlen
+        else:
+            self._evict(step)
+
+    def _evict(self, step):
+        i, delta = step >> self.shift, step & ((1 << self.shift) - 1)
+        self._base[i] ^= delta
+        self.evicted += 1
+
+    def steps(self):
+        """Return the retained (box index, changed digits bitmask) pairs, oldest first"""
+        mask = (1 << self.shift) - 1
+        ordered = self._steps[self._start:] + self._steps[:self._start]
+        return [(step >> self.shift, step & mask) for step in ordered]
+
+    def sync(self, values):
+        """Record every box whose value differs from its last recorded value
+
+        Search explores copies of the values dictionary; syncing when it moves to
+        another copy keeps the replay in step with the board being reduced.
+        """
+        for i, mask in self._state.items():
+            value = values[self.boxes[i]]
+            if self._mask(value) != mask:
+                self.record(self.boxes[i], value, value)
+
+    def replay(self):
+        """Generate the retained changes as (box, value) assignments, oldest first"""
+        state = dict(self._base)
+        mask = (1 << self.shift) - 1
+        for k in range(len(self._steps)):
+            step = self._steps[(self._start + k) % len(self._steps)]
+            i = step >> self.shift
+            state[i] ^= step & mask
+            yield self.boxes[i], ''.join(d for d in self.digits if state[i] & self.bit[d])
+
+    def assignments(self):
+        """Replay the retained changes as a list of (box, value) assignments"""
+        return list(self.replay())
+
+
 def assign_value(values, box, value):
     """You must use this function to update your values dictionary if you want to
-    try using the provided visualization tool. This function records each assignment
-    (in order) for later reconstruction.
+    try using the provided visualization tool. If a HistoryRecorder is active,
+    this function records each assignment (in order) for later reconstruction.
 
     Parameters
     ----------
@@ -85,18 +208,87 @@ def assign_value(values, box, value):
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
+    if recorder is not None:
+        recorder.record(box, values[box], value)
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
     return values
 
+def recording():
+    """Return True if a HistoryRecorder is active
+
+    The strategies test this once per call and write to the values dictionary
+    directly when it is False, so that solving without a recorder does not pay
+    for a call to assign_value on every write.
+    """
+    return recorder is not None
+
+
+def record_values(values):
+    """Bring the active HistoryRecorder, if any, up to date with values (see HistoryRecorder.sync)"""
+    if recorder is not None:
+        recorder.sync(values)
+
+
 def cross(A, B):
     """Cross product of elements in A and elements in B """
     return [x+y for x in A for y in B]
 
 
-def values2grid(values):
+def make_board(size=3, diagonal=True):
+    """Build the layout of a (size**2 x size**2) Sudoku board
+
+    Rows are labelled with letters and columns with numbers, so the boxes of a
+    16x16 board run from 'A1' to 'P16'. Digits are written with the first
+    size**2 symbols of DIGIT_SYMBOLS (1-9, then A, B, ...), one character per
+    box in grid strings.
+
+    Parameters
+    ----------
+    size(int)
+        the side length of the square regions, from 2 to 5 (3 is the usual 9x9 board)
+
+    diagonal(bool)
+        whether the two main diagonals are units too
+
+    Returns
+    -------
+    Board
+        a namedtuple of (size, rows, cols, digits, boxes, unitlist); for size 3 the
+        unitlist has the same units, in the same order, as the one in solution.py
+    """
+    n = size * size
+    if not 2 <= size <= 5:
+        raise ValueError("size must be between 2 and 5, not {}".format(size))
+    board_rows = ''.join(chr(ord('A') + r) for r in range(n))
+    board_cols = [str(c) for c in range(1, n + 1)]
+    row_units = [cross(r, board_cols) for r in board_rows]
+    column_units = [cross(board_rows, [c]) for c in board_cols]
+    square_units = [cross(board_rows[r:r + size], board_cols[c:c + size])
+                    for r in range(0, n, size) for c in range(0, n, size)]
+    unitlist = row_units + column_units + square_units
+    if diagonal:
+        unitlist.append([r + c for r, c in zip(board_rows, board_cols)])
+        unitlist.append([r + c for r, c in zip(reversed(board_rows), board_cols)])
+    return Board(size, board_rows, board_cols, DIGIT_SYMBOLS[:n],
+                 cross(board_rows, board_cols), unitlist)
+
+
+def board_size(grid):
+    """Return the region size of the board a grid string describes (3 for 81 characters)"""
+    size = int(round(len(grid) ** 0.25))
+    if size ** 4 != len(grid):
+        raise ValueError("a grid must have size**4 characters, not {}".format(len(grid)))
+    return size
+
+
+def check_grid(grid, size=3):
+    """Raise ValueError if a grid string has a character other than '.' and the digits of its board"""
+    invalid = set(grid) - set(DIGIT_SYMBOLS[:size * size]) - {'.'}
+    if invalid:
+        raise ValueError("invalid characters in grid: {!r}".format(''.join(sorted(invalid))))
+
+
+def values2grid(values, boxes=boxes):
     """Convert the dictionary board representation to as string
 
     Parameters
@@ -104,6 +296,9 @@ def values2grid(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    boxes(list)
+        the boxes of the board, in grid order (see make_board for larger boards)
+
     Returns
     -------
     a string representing a sudoku grid.
@@ -111,14 +306,13 @@ def values2grid(values):
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     """
     res = []
-    for r in rows:
-        for c in cols:
-            v = values[r + c]
-            res.append(v if len(v) == 1 else '.')
+    for box in boxes:
+        v = values[box]
+        res.append(v if len(v) == 1 else '.')
     return ''.join(res)
 
 
-def grid2values(grid):
+def grid2values(grid, boxes=boxes, digits=digits):
     """Convert grid into a dict of {square: char} with '123456789' for empties.
 
     Parameters
@@ -127,6 +321,9 @@ def grid2values(grid):
         a string representing a sudoku grid.
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    boxes(list), digits(string)
+        the boxes and digit symbols of the board (see make_board for larger boards)
     
     Returns
     -------
@@ -138,25 +335,31 @@ def grid2values(grid):
     sudoku_grid = {}
     for val, key in zip(grid, boxes):
         if val == '.':
-            sudoku_grid[key] = '123456789'
+            sudoku_grid[key] = digits
         else:
             sudoku_grid[key] = val
     return sudoku_grid
 
 
-def display(values):
+def display(values, board=None):
     """Display the values as a 2-D grid.
 
     Parameters
     ----------
         values(dict): The sudoku in dictionary form
+        board(Board): the board layout from make_board, if it is not the usual 9x9 board
     """
-    width = 1+max(len(values[s]) for s in boxes)
-    line = '+'.join(['-'*(width*3)]*3)
-    for r in rows:
-        print(''.join(values[r+c].center(width)+('|' if c in '36' else '')
-                      for c in cols))
-        if r in 'CF': print(line)
+    size, board_rows, board_cols = (3, rows, cols) if board is None else board[:3]
+    width = 1+max(len(values[r+c]) for r in board_rows for c in board_cols)
+    line = '+'.join(['-'*(width*size)]*size)
+
+    def region_edge(i, n):
+        return i % size == size - 1 and i < n - 1
+
+    for i, r in enumerate(board_rows):
+        print(''.join(values[r+c].center(width)+('|' if region_edge(j, len(board_cols)) else '')
+                      for j, c in enumerate(board_cols)))
+        if region_edge(i, len(board_rows)): print(line)
     print()
 
 
@@ -168,10 +371,11 @@ def reconstruct(values, history):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
+    history(HistoryRecorder or dict)
+        a HistoryRecorder, or a dictionary of the form {key: (key, (box, value))}
+        encoding a linked list where each element points to the parent and
+        identifies the value assignment that connects from the parent to the
+        current state
 
     Returns
     -------
@@ -179,6 +383,8 @@ def reconstruct(values, history):
         a list of (box, value) assignments that can be applied in order to the
         starting Sudoku puzzle to reach the solution
     """
+    if isinstance(history, HistoryRecorder):
+        return history.assignments()
     path = []
     prev = values2grid(values)
     while prev in history:
@@ -0,0 +1,186 @@
+"""Batched Sudoku propagation with NumPy.
+
+N boards are held together as an ``(N, boxes, digits)`` boolean tensor, and
+eliminate, only choice and naked twins are applied as array operations over all
+of the boards at once. The unit configuration is encoded in two matrices built
+from a ``unitlist`` (box/peer adjacency and unit/box membership), so the
+diagonal units of solution.py are handled exactly like rows and columns.
+
+Boards that stall before they are solved fall back to the bitmask search in
+bitboard.py, one board at a time.
+
+Limits: this engine is not faster than solving the boards one by one with the
+bitmask engine, and it is not used by solution.solve() or batch.py. On 1000
+generated hard puzzles (see generator.py) both take about 5.3s, because every
+board needs search and the search is the serial bitmask one; on 1000 easy
+puzzles the array passes (naked twins above all) take about 1.0s against 0.7s
+for the bitmask engine. It is kept as a reference implementation of the
+array formulation of the strategies; use batch.py with several workers for
+throughput.
+"""
+import numpy as np
+
+from bitboard import DIGITS, BitmaskSolver
+from utils import boxes
+
+
+class VectorizedSolver:
+    """Solve batches of Sudoku puzzles with array-wide constraint propagation
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    digits(str)
+        the symbols that may be placed in a box
+    """
+    def __init__(self, unitlist, boxes=boxes, digits=DIGITS):
+        self.fallback = BitmaskSolver(unitlist, boxes, digits)
+        self.boxes = self.fallback.boxes
+        self.digits = digits
+        n_boxes, n_digits = len(self.boxes), len(digits)
+
+        # unit_index[u, k] is the k-th box of unit u
+        self.unit_index = np.array(self.fallback.units, dtype=np.intp)
+        n_units, unit_size = self.unit_index.shape
+        # membership[u, b] is 1 when box b belongs to unit u
+        self.membership = np.zeros((n_units, n_boxes), dtype=np.float32)
+        self.membership[np.arange(n_units)[:, None], self.unit_index] = 1
+        # peer_matrix[a, b] is 1 when boxes a and b share a unit
+        self.peer_matrix = np.zeros((n_boxes, n_boxes), dtype=np.float32)
+        for i, peers in enumerate(self.fallback.peers):
+            self.peer_matrix[i, list(peers)] = 1
+        # slot_matrix[u * unit_size + k, b] is 1 when slot k of unit u is box b
+        self.slot_matrix = np.zeros((n_units * unit_size, n_boxes), dtype=np.float32)
+        self.slot_matrix[np.arange(n_units * unit_size), self.unit_index.ravel()] = 1
+        self.complete = (unit_size == n_digits)
+        self.weights = 1 << np.arange(n_digits, dtype=np.int64)
+
+    def grids2tensor(self, grids):
+        """Convert a sequence of grid strings into an (N, boxes, digits) boolean tensor"""
+        lookup = np.full(256, -1, dtype=np.intp)
+        for k, d in enumerate(self.digits):
+            lookup[ord(d)] = k
+        chars = np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8)
+        given = lookup[chars].reshape(len(grids), len(self.boxes))
+        cands = np.ones(given.shape + (len(self.digits),), dtype=bool)
+        filled = given >= 0
+        cands[filled] = np.arange(len(self.digits)) == given[filled][:, None]
+        return cands
+
+    def tensor2cands(self, board):
+        """Convert one (boxes, digits) board into a list of bitmasks for bitboard.py"""
+        return (board @ self.weights).tolist()
+
+    def eliminate(self, cands):
+        """Remove the digit of every solved box from its peers, on every board"""
+        solved = cands & (cands.sum(axis=2, keepdims=True) == 1)
+        seen = np.matmul(self.peer_matrix, solved.astype(np.float32)) > 0
+        return cands & ~seen
+
+    def only_choice(self, cands):
+        """Assign every digit that fits in exactly one box of a unit, on every board
+
+        Returns
+        -------
+        tuple
+            the new candidate tensor and a boolean (N,) array marking boards
+            where a unit has no place left for some digit or a box is the only
+            place for two different digits
+        """
+        counts = np.matmul(self.membership, cands.astype(np.float32))
+        unique = np.matmul(self.membership.T, (counts == 1).astype(np.float32)) > 0
+        hits = cands & unique
+        n_hits = hits.sum(axis=2)
+        dead = (n_hits > 1).any(axis=1)
+        if self.complete:
+            dead |= (counts == 0).any(axis=(1, 2))
+        return np.where(n_hits[:, :, None] > 0, hits, cands), dead
+
+    def naked_twins(self, cands):
+        """Eliminate the digits of naked twins from the rest of their units, on every board
+
+        Returns
+        -------
+        tuple
+            the new candidate tensor and a boolean (N,) array marking boards
+            where three boxes of a unit share the same two candidates
+        """
+        n_boards = cands.shape[0]
+        bivalue = cands.sum(axis=2) == 2
+        codes = np.where(bivalue, cands @ self.weights, -1)
+        unit_codes = codes[:, self.unit_index]
+        same = (unit_codes[:, :, :, None] == unit_codes[:, :, None, :]) & (unit_codes[:, :, :, None] >= 0)
+        partners = same.sum(axis=3)
+        twin = partners == 2
+        dead = (partners > 2).any(axis=(1, 2))
+        unit_cands = cands[:, self.unit_index]
+        twin_digits = (unit_cands & twin[:, :, :, None]).any(axis=2)
+        removed = twin_digits[:, :, None, :] & ~twin[:, :, :, None]
+        removed = removed.reshape(n_boards, -1, len(self.digits)).astype(np.float32)
+        removed = np.matmul(self.slot_matrix.T, removed) > 0
+        return cands & ~removed, dead
+
+    def propagate(self, cands):
+        """Apply the strategies to every board until none of them changes
+
+        Parameters
+        ----------
+        cands(ndarray)
+            an (N, boxes, digits) boolean tensor
+
+        Returns
+        -------
+        tuple
+            the reduced tensor and a boolean (N,) array marking the boards that
+            reached a contradiction
+        """
+        dead = np.zeros(cands.shape[0], dtype=bool)
+        active = np.arange(cands.shape[0])
+        while active.size:
+            before = cands[active]
+            work = self.eliminate(before)
+            work, dead_choice = self.only_choice(work)
+            work, dead_twins = self.naked_twins(work)
+            cands[active] = work
+            failed = dead_choice | dead_twins | (work.sum(axis=2) == 0).any(axis=1)
+            dead[active[failed]] = True
+            changed = (work != before).any(axis=(1, 2))
+            active = active[changed & ~failed]
+        return cands, dead
+
+    def solve(self, grids, chunksize=4096):
+        """Solve a sequence of grid strings
+
+        Parameters
+        ----------
+        grids(list)
+            strings representing sudoku grids (see solution.solve)
+
+        chunksize(int)
+            the number of boards propagated together; bounds the size of the
+            intermediate arrays
+
+        Returns
+        -------
+        list
+            the dictionary representation of each solved grid, or False if the
+            corresponding puzzle has no solution
+        """
+        results = []
+        for start in range(0, len(grids), chunksize):
+            cands, dead = self.propagate(self.grids2tensor(grids[start:start + chunksize]))
+            stalled = (cands.sum(axis=2) > 1).any(axis=1)
+            for board, is_dead, is_stalled in zip(cands, dead, stalled):
+                if is_dead:
+                    results.append(False)
+                    continue
+                masks = self.tensor2cands(board)
+                if is_stalled:
+                    masks = self.fallback.search(masks)
+                results.append(masks and self.fallback.cands2values(masks))
+        return results
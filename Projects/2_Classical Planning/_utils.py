@@ -136,6 +136,40 @@ def encode_state(fs, fluent_map):
     return tuple([f in fs.pos for f in fluent_map])
 
 
+def encode_bitmask(fs, fluent_map):
+    """ Convert a FluentState into an integer bitmask where bit i is set when
+    fluent_map[i] is True
+
+    Planning problems encode their states this way, so that testing the
+    preconditions of an action or applying its effects is a few integer
+    operations (see strips.StripsTask).
+
+    Parameters
+    ----------
+    fs: FluentState
+        A state object represented as a FluentState
+
+    fluent_map:
+        An ordered sequence of fluents
+
+    Returns
+    -------
+    int with bit i set for each True fluent fluent_map[i]
+    """
+    pos = set(fs.pos)
+    return sum(1 << i for i, f in enumerate(fluent_map) if f in pos)
+
+
+def state_values(state, fluent_map):
+    """ Return the ordered sequence of True/False values of a state encoded
+    either as an integer bitmask (see encode_bitmask) or as a sequence of
+    True/False values (see encode_state)
+    """
+    if isinstance(state, int):
+        return tuple(bool(state >> i & 1) for i in range(len(fluent_map)))
+    return tuple(state)
+
+
 def decode_state(state, fluent_map):
     """ Convert an ordered list of True/False values into a FluentState
     (list of positive fluents and negative fluents)
@@ -147,7 +181,8 @@ def decode_state(state, fluent_map):
     Parameters
     ----------
     state:
-        A state represented as an ordered sequence of True/False values
+        A state represented as an ordered sequence of True/False values or as an
+        integer bitmask
 
     fluent_map:
         An ordered sequence of fluents
@@ -159,7 +194,7 @@ def decode_state(state, fluent_map):
     fluent_map corresponding to False entries in the neg_list
     """
     fs = FluentState(set(), set())
-    for idx, elem in enumerate(state):
+    for idx, elem in enumerate(state_values(state, fluent_map)):
         if elem:
             fs.pos.append(fluent_map[idx])
         else:
@@ -5,9 +5,12 @@ then create problem instances and solve them with calls to the various search
 functions."""
 
 from .utils import (
-    is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue, name
+    is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue,
+    IndexedPriorityQueue, name
 )
 
+from array import array
+import heapq
 import sys
 
 infinity = float('inf')
@@ -204,13 +207,19 @@ def best_first_graph_search(problem, f):
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+
+    The frontier holds one node per state. The lowest path cost found so far
+    for each state is recorded, and a node reaching a state by a cheaper path
+    replaces the queued node (decrease-key); a node that is not cheaper is
+    dropped before f is computed for it."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = IndexedPriorityQueue(min, f, key=lambda n: n.state)
     frontier.append(node)
+    best_g = {node.state: node.path_cost}
     explored = set()
     while frontier:
         node = frontier.pop()
@@ -218,13 +227,10 @@ def best_first_graph_search(problem, f):
             return node
         explored.add(node.state)
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
-                frontier.append(child)
-            elif child in frontier:
-                incumbent = frontier[child]
-                if f(child) < f(incumbent):
-                    # del frontier[incumbent]
-                    frontier.append(child)
+            if child.state in explored or child.path_cost >= best_g.get(child.state, infinity):
+                continue
+            best_g[child.state] = child.path_cost
+            frontier.append(child)
     return None
 
 
@@ -261,6 +267,127 @@ def iterative_deepening_search(problem):
         if result != 'cutoff':
             return result
 
+# ______________________________________________________________________________
+# Breadth-first search with compact visited sets
+
+
+class CompactTree:
+
+    """The states reached by a breadth-first search. Each state is stored
+    once, and the index of its parent and the action between them are kept in
+    parallel arrays instead of a Node per state. The states list is also the
+    queue: the states of each layer follow the states of the layer before.
+    The reached states are a set, or with indexed=True a dict mapping each
+    state to its index, so that the path to any state can be found."""
+
+    def __init__(self, roots, indexed=False):
+        self.states = list(dict.fromkeys(roots))
+        if indexed:
+            self.reached = {state: i for i, state in enumerate(self.states)}
+        else:
+            self.reached = set(self.states)
+        self.parents = array('l', [-1] * len(self.states))
+        self.actions = [None] * len(self.states)
+        self.layer = range(len(self.states))
+
+    def __contains__(self, state):
+        return state in self.reached
+
+    def add(self, state, parent, action):
+        "Record a new state, reached from the state at index parent."
+        if isinstance(self.reached, dict):
+            self.reached[state] = len(self.states)
+        else:
+            self.reached.add(state)
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+
+    def next_layer(self):
+        "Move on to the states added since the current layer started."
+        self.layer = range(self.layer.stop, len(self.states))
+
+    def actions_to(self, i):
+        "The actions from the state at index i back to a root, in the order found."
+        actions = []
+        while self.parents[i] >= 0:
+            actions.append(self.actions[i])
+            i = self.parents[i]
+        return actions
+
+
+def replay(problem, actions):
+    "Return the Node reached by executing actions from problem.initial."
+    node = Node(problem.initial)
+    for action in actions:
+        node = node.child_node(problem, action)
+    return node
+
+
+def compact_breadth_first_search(problem):
+    """Breadth-first graph search storing each state once in a CompactTree
+    instead of a Node. It finds the same solutions as breadth_first_search;
+    the states must be hashable, and are most compact as ints (see
+    planning_problem.BasePlanningProblem)."""
+    if problem.goal_test(problem.initial):
+        return Node(problem.initial)
+    tree = CompactTree([problem.initial])
+    for i, state in enumerate(tree.states):
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child not in tree:
+                tree.add(child, i, action)
+                if problem.goal_test(child):
+                    return replay(problem, reversed(tree.actions_to(len(tree.states) - 1)))
+    return None
+
+
+def bidirectional_breadth_first_search(problem):
+    """Breadth-first search from the initial state and backwards from the goal
+    states at the same time, expanding a whole layer of the side with the
+    smaller layer at each step, until the two sides meet. Returns a shortest
+    solution with unit step costs.
+
+    The problem must provide goal_states(), every state that satisfies the
+    goal, and predecessors(state), the (action, previous state) pairs such
+    that result(previous state, action) == state. This is practical for
+    problems with invertible actions, such as the Air Cargo problems (Load and
+    Unload, Fly back), where both are small. Expansions in both directions
+    count towards the statistics of an InstrumentedProblem."""
+    forward = CompactTree([problem.initial], indexed=True)
+    backward = CompactTree(problem.goal_states(), indexed=True)
+    if problem.initial in backward:
+        return Node(problem.initial)
+
+    def successors(state):
+        return ((action, problem.result(state, action)) for action in problem.actions(state))
+
+    while forward.layer and backward.layer:
+        if len(forward.layer) <= len(backward.layer):
+            tree, other, expand = forward, backward, successors
+        else:
+            tree, other, expand = backward, forward, problem.predecessors
+        best = None
+        for i in tree.layer:
+            for action, state in expand(tree.states[i]):
+                if state in tree:
+                    continue
+                tree.add(state, i, action)
+                if state in other:
+                    # every state of this layer is at the same depth, so the
+                    # shortest path goes through the meeting state closest
+                    # to the root of the other side
+                    length = len(other.actions_to(other.reached[state]))
+                    if best is None or length < best[0]:
+                        best = (length, state)
+        tree.next_layer()
+        if best is not None:
+            state = best[1]
+            actions = (list(reversed(forward.actions_to(forward.reached[state]))) +
+                       backward.actions_to(backward.reached[state]))
+            return replay(problem, actions)
+    return None
+
 # ______________________________________________________________________________
 # Informed (Heuristic) Search
 
@@ -310,6 +437,183 @@ def recursive_best_first_search(problem, h=None):
     result, bestf = RBFS(problem, node, infinity)
     return result
 
+# ______________________________________________________________________________
+# Memory-bounded heuristic search
+
+
+def iterative_deepening_astar_search(problem, h=None, table_size=100000):
+    """Iterative deepening A* (IDA*): depth-first searches bounded by f = g + h,
+    raising the bound to the smallest f that exceeded it until a goal is found.
+    Memory grows with the depth of the solution only, plus a transposition
+    table that remembers the lowest g at which each state was reached in the
+    current iteration, so paths reaching a state no cheaper are pruned. The
+    table holds at most table_size states (0 disables it; cycles along the
+    current path are still pruned)."""
+    h = memoize(h or problem.h, 'h')
+    root = Node(problem.initial)
+    table = {}
+    on_path = set()
+
+    def visit(state, g):
+        if table_size:
+            best = table.get(state)
+            if best is not None and best <= g:
+                return False
+            if best is not None or len(table) < table_size:
+                table[state] = g
+        return state not in on_path
+
+    def search(node, bound):
+        f = node.path_cost + h(node)
+        if f > bound:
+            return None, f
+        if problem.goal_test(node.state):
+            return node, f
+        minimum = infinity
+        on_path.add(node.state)
+        children = [c for c in node.expand(problem) if visit(c.state, c.path_cost)]
+        children.sort(key=lambda c: c.path_cost + h(c))
+        for child in children:
+            found, t = search(child, bound)
+            if found is not None:
+                return found, t
+            minimum = min(minimum, t)
+        on_path.discard(node.state)
+        return None, minimum
+
+    bound = h(root)
+    while bound < infinity:
+        table.clear()
+        on_path.clear()
+        visit(root.state, 0)
+        found, bound = search(root, bound)
+        if found is not None:
+            return found
+    return None
+
+
+def sma_star_search(problem, h=None, max_nodes=10000):
+    """Simplified memory-bounded A* (SMA*): A* that keeps at most max_nodes
+    nodes in memory. When memory is full, the shallowest leaf with the highest
+    f is forgotten and its parent remembers the leaf's backed-up f, so the
+    subtree is regenerated when it becomes the most promising again. Nodes
+    that cannot reach a goal within the budget get f = infinity. A successor
+    is not generated while its state is in memory with a path cost no higher,
+    so permutations of independent actions do not fill the memory. Returns
+    an optimal solution (with an admissible h) if the shallowest one fits in
+    memory, and None otherwise."""
+    h = memoize(h or problem.h, 'h')
+    counter = [0]
+    open_heap, leaf_heap = [], []
+
+    def push(node):
+        node.version += 1
+        counter[0] += 1
+        if not node.children and not node.forgotten:
+            heapq.heappush(open_heap, (node.f, -node.depth, counter[0], node.version, node))
+        elif node.forgotten:
+            f = min(node.forgotten.values())
+            heapq.heappush(open_heap, (f, -node.depth - 1, counter[0], node.version, node))
+        if not node.children and node.parent is not None:
+            heapq.heappush(leaf_heap, (-node.f, node.depth, counter[0], node.version, node))
+
+    def valid(entry):
+        return entry[-1].version == entry[-2] and entry[-1].in_memory
+
+    def pop(heap):
+        while heap:
+            entry = heapq.heappop(heap)
+            if valid(entry):
+                return entry[-1]
+        return None
+
+    def compact(heap):
+        # drop the stale entries, so that the heaps stay proportional to max_nodes
+        if len(heap) > 4 * max_nodes:
+            heap[:] = [entry for entry in heap if valid(entry)]
+            heapq.heapify(heap)
+
+    def backup(node):
+        while node is not None:
+            f = min([c.f for c in node.children] + list(node.forgotten.values()), default=infinity)
+            if f == node.f:
+                push(node)
+                return
+            node.f = f
+            push(node)
+            node = node.parent
+
+    def ancestors(node):
+        states = set()
+        while node is not None:
+            states.add(node.state)
+            node = node.parent
+        return states
+
+    def init(node, f):
+        node.f, node.children, node.forgotten = f, [], {}
+        node.in_memory, node.version = True, 0
+        incumbent = in_memory.get(node.state)
+        if incumbent is None or node.path_cost < incumbent.path_cost:
+            in_memory[node.state] = node
+        return node
+
+    def forget(node):
+        node.in_memory = False
+        if in_memory.get(node.state) is node:
+            del in_memory[node.state]
+
+    in_memory = {}
+
+    root = init(Node(problem.initial), 0)
+    root.f = h(root)
+    push(root)
+    size = 1
+    while True:
+        best = pop(open_heap)
+        if best is None or best.f == infinity:
+            return None
+        if not best.children and not best.forgotten and problem.goal_test(best.state):
+            return best
+        if best.forgotten:
+            # regenerate the most promising forgotten successors
+            f_min = min(best.forgotten.values())
+            wanted = {state for state, f in best.forgotten.items() if f == f_min}
+        else:
+            wanted = None
+        skip = ancestors(best) | {c.state for c in best.children}
+        for child in best.expand(problem):
+            if child.state in skip or (wanted is not None and child.state not in wanted):
+                continue
+            incumbent = in_memory.get(child.state)
+            if incumbent is not None and incumbent.path_cost <= child.path_cost:
+                continue
+            if wanted is not None:
+                f = best.forgotten.pop(child.state)
+            elif child.depth >= max_nodes - 1 and not problem.goal_test(child.state):
+                f = infinity
+            else:
+                f = max(best.f, child.path_cost + h(child))
+            best.children.append(init(child, f))
+            push(child)
+            size += 1
+        if wanted is not None:
+            for state in wanted:
+                best.forgotten.pop(state, None)
+        backup(best)
+        while size > max_nodes:
+            leaf = pop(leaf_heap)
+            if leaf is None:
+                break
+            parent = leaf.parent
+            forget(leaf)
+            parent.children.remove(leaf)
+            parent.forgotten[leaf.state] = leaf.f
+            size -= 1
+            backup(parent)
+        compact(open_heap)
+        compact(leaf_heap)
+
 # ______________________________________________________________________________
 
 # Code to compare searchers on various problems.
@@ -332,6 +636,13 @@ class InstrumentedProblem(Problem):
         self.states += 1
         return self.problem.result(state, action)
 
+    def predecessors(self, state):
+        # a backward expansion (see bidirectional_breadth_first_search)
+        self.succs += 1
+        pairs = self.problem.predecessors(state)
+        self.states += len(pairs)
+        return pairs
+
     def goal_test(self, state):
         self.goal_tests += 1
         result = self.problem.goal_test(state)
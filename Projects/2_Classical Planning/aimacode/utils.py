@@ -7,6 +7,7 @@ import operator
 import os.path
 import random
 import math
+import weakref
 
 import heapq
 from functools import lru_cache
@@ -142,12 +143,15 @@ class Expr(object):
     """A mathematical expression with an operator and 0 or more arguments.
     op is a str like '+' or 'sin'; args are Expressions.
     Expr('x') or Symbol('x') creates a symbol (a nullary Expr).
-    Expr('-', x) creates a unary; Expr('+', x, 1) creates a binary."""
-    __slots__ = ["op", "args", "__hash"]
+    Expr('-', x) creates a unary; Expr('+', x, 1) creates a binary.
+    Expressions are immutable, so the logical negation ~x is built once and
+    cached on x."""
+    __slots__ = ["op", "args", "__hash", "_negation"]
     def __init__(self, op, *args):
         self.op = op
         self.args = args
         self.__hash = hash(self.op) ^ hash(self.args)
+        self._negation = None
 
     def __eq__(self, other):
         return (isinstance(other, Expr)
@@ -159,7 +163,12 @@ class Expr(object):
     # custom unary operator overloads to handle 
     def __pos__(self): return self
     def __neg__(self): return self.args[0] if '-' == self.op else Expr("-", self)
-    def __invert__(self): return self.args[0] if '~' == self.op else Expr("~", self)
+    def __invert__(self):
+        if '~' == self.op:
+            return self.args[0]
+        if self._negation is None:
+            self._negation = self.__class__("~", self)
+        return self._negation
 
     # Operator overloads
     # def __neg__(self): return Expr('-', self)
@@ -219,6 +228,64 @@ class Expr(object):
             opp = (' ' + op + ' ')
             return '(' + opp.join(args) + ')'
 
+
+class InternedExpr(Expr):
+    """An Expr that is the only instance of its value.
+    InternedExpr(op, *args) returns the existing instance when one was already
+    made with the same op and (interned) args, so equal interned expressions
+    are the same object: equality between them is an identity test, and ~x is
+    the same object every time. Interned expressions still compare (and hash)
+    equal to plain Exprs with the same value. Use intern_expr to intern an
+    existing Expr and set_interning to make expr() return interned ones.
+    The table holds weak references to the expressions and identifies their
+    interned args by id, so an interned expression (and its cached negation,
+    which refers back to it) is freed once nothing else refers to it."""
+    __slots__ = ['__weakref__']
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, op, *args):
+        args = tuple(intern_expr(arg) for arg in args)
+        # an interned arg is alive as long as an expression using it is, so
+        # its id cannot be reused by another arg while the entry is valid
+        key = (op,) + tuple((id(arg),) if isinstance(arg, InternedExpr) else arg for arg in args)
+        self = cls._table.get(key)
+        if self is None:
+            self = object.__new__(cls)
+            Expr.__init__(self, op, *args)
+            cls._table[key] = self
+        return self
+
+    def __init__(self, op, *args):
+        pass
+
+    # identity equality; comparing with a plain Expr falls back to the
+    # reflected Expr.__eq__, which compares values
+    __eq__ = object.__eq__
+    __hash__ = Expr.__hash__
+
+    def __reduce__(self):
+        return (InternedExpr, (self.op,) + self.args)
+
+
+def intern_expr(x):
+    "Return the InternedExpr equal to x (x itself if it is not an Expr)."
+    if isinstance(x, InternedExpr) or not isinstance(x, Expr):
+        return x
+    return InternedExpr(x.op, *x.args)
+
+
+_interning = False
+
+
+def set_interning(enabled=True):
+    """Turn the interning mode of expr() on or off and return the previous mode.
+    In interning mode expr() returns InternedExpr instances, so the literals of
+    planning problems built afterwards are canonical objects."""
+    global _interning
+    previous, _interning = _interning, enabled
+    expr.cache_clear()
+    return previous
+
 # An 'Expression' is either an Expr or a Number.
 # Symbol is not an explicit type; it is any Expr with 0 args.
 
@@ -266,14 +333,14 @@ def expr(x):
     """Shortcut to create an Expression. x is a str in which:
     - identifiers are automatically defined as Symbols.
     - ==> is treated as an infix |'==>'|, as are <== and <=>.
-    If x is already an Expression, it is returned unchanged. Example:
+    If x is already an Expression, it is returned unchanged (or interned in
+    interning mode, see set_interning). Example:
     >>> expr('P & Q ==> Q')
     ((P & Q) ==> Q)
     """
     if isinstance(x, str):
-        return eval(expr_handle_infix_ops(x), defaultkeydict(Symbol))
-    else:
-        return x
+        x = eval(expr_handle_infix_ops(x), defaultkeydict(Symbol))
+    return intern_expr(x) if _interning else x
 
 infix_ops = '==> <== <=>'.split()
 
@@ -307,6 +374,7 @@ class Queue:
         Stack(): A Last In First Out Queue.
         FIFOQueue(): A First In First Out Queue.
         PriorityQueue(order, f): Queue in sorted order (default min-first).
+        IndexedPriorityQueue(order, f, key): PriorityQueue with one item per key.
     Each type supports the following methods and functions:
         q.append(item)  -- add an item to the queue
         q.extend(items) -- equivalent to: for item in items: q.append(item)
@@ -389,6 +457,53 @@ class PriorityQueue(Queue):
         if self._A[key] > 0:
             return key
 
+
+class IndexedPriorityQueue(Queue):
+    """A priority queue holding at most one item per key, with O(1) membership
+    and decrease-key.
+
+    Items are identified by key(item) (for search nodes, typically the state).
+    Appending an item whose key is already queued replaces the incumbent; the
+    caller decides whether the new item is better. The replaced heap entry is
+    left in the heap and skipped when it reaches the top (lazy deletion), so
+    every operation is O(log n) or O(1).
+    """
+
+    def __init__(self, order=min, f=lambda x: x, key=lambda x: x):
+        if order is not min:
+            raise ValueError("IndexedPriorityQueue only supports min-first order")
+        self.heap = []
+        self.entries = {}
+        self.f = f
+        self.key = key
+
+    def append(self, item):
+        entry = (self.f(item), item)
+        self.entries[self.key(item)] = entry
+        heapq.heappush(self.heap, entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pop(self):
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            key = self.key(entry[1])
+            if self.entries.get(key) is entry:
+                del self.entries[key]
+                return entry[1]
+        raise IndexError("pop from an empty priority queue")
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        """Return the queued item with the given key"""
+        return self.entries[key][1]
+
+    def __delitem__(self, key):
+        del self.entries[key]
+
 # ______________________________________________________________________________
 # Useful Shorthands
 
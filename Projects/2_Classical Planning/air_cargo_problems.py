@@ -1,4 +1,6 @@
 
+from itertools import product
+
 from aimacode.planning import Action
 from aimacode.utils import expr
 from _utils import (
@@ -125,6 +127,27 @@ class AirCargoProblem(BasePlanningProblem):
 
         return load_actions() + unload_actions() + fly_actions()
 
+    def goal_states(self):
+        """ Return every state that satisfies the goal: the cargos in the goal
+        are at their goal airport, the other cargos are at any airport or in any
+        plane, and the planes are at any airport. Used by
+        aimacode.search.bidirectional_breadth_first_search.
+
+        Returns
+        -------
+            list of states (bitmasks, see BasePlanningProblem)
+        """
+        bit = {fluent: 1 << i for i, fluent in enumerate(self.state_map)}
+        options = []
+        for c in self.cargos:
+            places = ([expr("At({}, {})".format(c, a)) for a in self.airports] +
+                      [expr("In({}, {})".format(c, p)) for p in self.planes])
+            goal_places = [f for f in places if f in self.goal]
+            options.append(goal_places or places)
+        for p in self.planes:
+            options.append([expr("At({}, {})".format(p, a)) for a in self.airports])
+        return [sum(bit[f] for f in fluents) for fluents in product(*options)]
+
 
 def air_cargo_p1():
     cargos = ['C1', 'C2']
@@ -0,0 +1,371 @@
+""" Planning graph with integer bitset layers
+
+Every literal and action of a planning problem is interned to an integer
+index by a GraphIndex, so the members of a layer and the set of items mutex
+with each member are plain Python integers used as bitsets. Testing whether
+the preconditions of an action hold in a literal layer, or whether two items
+are mutex, is then a few word operations instead of set lookups on Expr
+objects.
+
+Literal 2*i is the fluent problem.state_map[i] and literal 2*i + 1 is its
+negation, so the negation of literal k is k ^ 1. Actions are the no-op
+actions of every literal followed by problem.actions_list.
+
+BitsetPlanningGraph follows the same rules as my_planning_graph.PlanningGraph
+(serialization, inconsistent effects, interference, competing needs,
+inconsistent support and leveling) and provides the same heuristics.
+"""
+from itertools import chain
+
+from _utils import state_values
+from layers import makeNoOp, make_node
+
+
+def bits(mask):
+    """ Yield the indices of the bits set in an integer """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class GraphIndex:
+    """ Integer index of the literals and actions of a planning problem
+
+    Attributes
+    ----------
+    fluents : list
+        The fluents of the problem (problem.state_map)
+
+    literals : list
+        Mapping from each literal index to the literal (an aimacode.utils.Expr)
+
+    actions : list
+        Mapping from each action index to the layers.ActionNode
+
+    preconditions, effects : list
+        Mapping from each action index to the bitset of its precondition
+        (effect) literals
+
+    negated_preconditions, negated_effects : list
+        Mapping from each action index to the bitset of the negations of its
+        precondition (effect) literals
+
+    static_mutexes : list
+        Mapping from each action index to the bitset of actions that are mutex
+        with it by inconsistent effects or interference
+
+    needs, makes : list
+        Mapping from each literal index to the bitset of actions that have the
+        literal as a precondition (as an effect)
+
+    no_ops, real_actions, all_actions : int
+        The bitsets of the no-op actions, of the actions of the problem and of
+        both
+
+    goal : int
+        The bitset of the goal literals
+
+    A GraphIndex only depends on the problem, so it is compiled once (see
+    BasePlanningProblem.graph_index) and shared by the planning graphs built
+    for every state.
+    """
+    def __init__(self, problem):
+        self.literals = []
+        self._literal_index = {}
+        self._even = 0
+        self.fluents = list(problem.state_map)
+        for fluent in self.fluents:
+            self._add_fluent(fluent)
+
+        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+        self.actions = no_ops + [make_node(a) for a in problem.actions_list]
+        self._action_index = {action: i for i, action in enumerate(self.actions)}
+        self.preconditions = [self.literal_mask(a.preconditions) for a in self.actions]
+        self.effects = [self.literal_mask(a.effects) for a in self.actions]
+        self.negated_preconditions = [self.negate(mask) for mask in self.preconditions]
+        self.negated_effects = [self.negate(mask) for mask in self.effects]
+        self.no_ops = sum(1 << i for i, a in enumerate(self.actions) if a.no_op)
+        self.all_actions = (1 << len(self.actions)) - 1
+        self.real_actions = self.all_actions & ~self.no_ops
+        self.goal = self.literal_mask(problem.goal)
+
+        self.needs = [0] * len(self.literals)
+        self.makes = [0] * len(self.literals)
+        for i in range(len(self.actions)):
+            for literal in bits(self.preconditions[i]):
+                self.needs[literal] |= 1 << i
+            for literal in bits(self.effects[i]):
+                self.makes[literal] |= 1 << i
+
+        # inconsistent effects and interference do not depend on the state
+        self.static_mutexes = [0] * len(self.actions)
+        for i in range(len(self.actions)):
+            mutex = 0
+            for literal in bits(self.negated_effects[i]):
+                mutex |= self.makes[literal] | self.needs[literal]
+            for literal in bits(self.negated_preconditions[i]):
+                mutex |= self.makes[literal]
+            self.static_mutexes[i] |= mutex & ~(1 << i)
+            for j in bits(mutex & ~(1 << i)):
+                self.static_mutexes[j] |= 1 << i
+
+    def _add_fluent(self, fluent):
+        for literal in (fluent, ~fluent):
+            self._literal_index[literal] = len(self.literals)
+            self.literals.append(literal)
+        self._even = int('01' * (len(self.literals) // 2), 2)
+
+    def literal_mask(self, literals):
+        """ Return the bitset of a collection of literals """
+        mask = 0
+        for literal in literals:
+            if literal not in self._literal_index:
+                self._add_fluent(literal if literal.op != '~' else ~literal)
+            mask |= 1 << self._literal_index[literal]
+        return mask
+
+    def state_mask(self, state):
+        """ Return the bitset of the literals of a state (a bitmask or a sequence
+        of True/False values in the order of problem.state_map)
+        """
+        values = state_values(state, self.fluents)
+        return sum(1 << (2 * i + (not value)) for i, value in enumerate(values))
+
+    def negate(self, mask):
+        """ Return the bitset of the negations of the literals in a bitset """
+        return ((mask & self._even) << 1) | ((mask >> 1) & self._even)
+
+    def literal_id(self, literal):
+        return self._literal_index.get(literal)
+
+    def action_id(self, action):
+        return self._action_index.get(action)
+
+
+class BitsetLayer:
+    """ Base class for the layers of a BitsetPlanningGraph
+
+    Attributes
+    ----------
+    index : GraphIndex
+        The index shared by all layers of a planning graph
+
+    members : int
+        The bitset of the items (literals or actions) in the layer
+
+    mutexes : list
+        Mapping from each item index to the bitset of items in the layer that
+        are mutex with it (0 for items that are not in the layer)
+
+    parent_layer : BitsetLayer
+        The preceding layer of the planning graph (an empty action layer for
+        the root literal layer)
+    """
+    __slots__ = ['index', 'members', 'mutexes', 'parent_layer', '_ignore_mutexes']
+
+    def __init__(self, index, members=0, parent_layer=None, ignore_mutexes=False):
+        self.index = index
+        self.members = members
+        self.mutexes = [0] * self._size()
+        self.parent_layer = parent_layer
+        self._ignore_mutexes = ignore_mutexes
+
+    def _size(self):
+        raise NotImplementedError
+
+    def _id(self, item):
+        raise NotImplementedError
+
+    def _items(self):
+        raise NotImplementedError
+
+    def __contains__(self, item):
+        i = self._id(item)
+        return i is not None and bool(self.members >> i & 1)
+
+    def __iter__(self):
+        items = self._items()
+        return (items[i] for i in bits(self.members))
+
+    def __len__(self):
+        return bin(self.members).count('1')
+
+    def __eq__(self, other):
+        return self.members == other.members and self.mutexes == other.mutexes
+
+    def is_mutex(self, itemA, itemB):
+        a, b = self._id(itemA), self._id(itemB)
+        return a is not None and b is not None and bool(self.mutexes[a] >> b & 1)
+
+
+class BitsetActionLayer(BitsetLayer):
+    __slots__ = ['_serialize']
+
+    def __init__(self, index, members=0, parent_layer=None, serialize=True, ignore_mutexes=False):
+        super().__init__(index, members, parent_layer, ignore_mutexes)
+        self._serialize = serialize
+
+    def _size(self): return len(self.index.actions)
+    def _id(self, action): return self.index.action_id(action)
+    def _items(self): return self.index.actions
+
+    def update_mutexes(self):
+        index, members = self.index, self.members
+        needs = index.needs
+        for a in bits(members):
+            mutex = index.static_mutexes[a]
+            if self._serialize and index.real_actions >> a & 1:
+                mutex |= index.real_actions
+            if not self._ignore_mutexes:
+                # competing needs
+                parent_mutexes = 0
+                for literal in bits(index.preconditions[a]):
+                    parent_mutexes |= self.parent_layer.mutexes[literal]
+                for literal in bits(parent_mutexes):
+                    mutex |= needs[literal]
+            self.mutexes[a] = mutex & members & ~(1 << a)
+
+
+class BitsetLiteralLayer(BitsetLayer):
+    __slots__ = []
+
+    def _size(self): return len(self.index.literals)
+    def _id(self, literal): return self.index.literal_id(literal)
+    def _items(self): return self.index.literals
+
+    def update_mutexes(self):
+        index, members = self.index, self.members
+        for x in bits(members):
+            self.mutexes[x] = members & (1 << (x ^ 1))
+        actions = self.parent_layer
+        if self._ignore_mutexes or not actions.members:
+            return
+        # inconsistent support: every action achieving one literal is mutex
+        # with every action achieving the other
+        support = [(x, index.makes[x] & actions.members) for x in bits(members)]
+        for i, (x, supporters) in enumerate(support):
+            common = -1
+            for a in bits(supporters):
+                common &= actions.mutexes[a]
+            if not common:
+                continue
+            for y, other in support[i + 1:]:
+                if not other & ~common:
+                    self.mutexes[x] |= 1 << y
+                    self.mutexes[y] |= 1 << x
+
+
+class BitsetPlanningGraph:
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False, index=None):
+        """
+        Parameters
+        ----------
+        problem : PlanningProblem
+            An instance of the PlanningProblem class
+
+        state : int or tuple(bool)
+            A bitmask (or an ordered sequence of True/False values) indicating
+            the literal value of the corresponding fluent in problem.state_map
+
+        serialize : bool
+            Flag indicating whether to serialize non-persistence actions
+
+        ignore_mutexes : bool
+            Flag indicating whether to skip the dynamic mutexes (competing needs
+            and inconsistent support)
+
+        index : GraphIndex
+            The compiled index of the problem; a new one is built when omitted
+        """
+        self._serialize = serialize
+        self._is_leveled = False
+        self._ignore_mutexes = ignore_mutexes
+        self.index = index or GraphIndex(problem)
+        self.goal = self.index.goal
+
+        layer = BitsetLiteralLayer(self.index, self.index.state_mask(state),
+                                   BitsetActionLayer(self.index), ignore_mutexes)
+        layer.update_mutexes()
+        self.literal_layers = [layer]
+        self.action_layers = []
+
+    def _level_costs(self):
+        """ Yield the level at which each goal literal first appears """
+        reached = 0
+        level = 0
+        while True:
+            found = self.goal & self.literal_layers[level].members & ~reached
+            for _ in bits(found):
+                yield level
+            reached |= found
+            if reached == self.goal:
+                return
+            if level + 1 == len(self.literal_layers):
+                if self._is_leveled:
+                    yield float('inf')
+                    return
+                self._extend()
+            level += 1
+
+    def h_levelsum(self):
+        """ Return the sum of the level costs of the goal literals (see
+        PlanningGraph.h_levelsum), or infinity if a goal is unreachable
+        """
+        return sum(self._level_costs())
+
+    def h_maxlevel(self):
+        """ Return the largest level cost of any goal literal (see
+        PlanningGraph.h_maxlevel), or infinity if a goal is unreachable
+        """
+        return max(self._level_costs(), default=0)
+
+    def h_setlevel(self):
+        """ Return the first level where all goal literals appear and no pair of
+        them is mutex (see PlanningGraph.h_setlevel), or infinity if the graph
+        levels off first
+        """
+        level = 0
+        while True:
+            layer = self.literal_layers[level]
+            if (self.goal & ~layer.members == 0
+                    and not any(layer.mutexes[g] & self.goal for g in bits(self.goal))):
+                return level
+            if level + 1 == len(self.literal_layers):
+                if self._is_leveled:
+                    return float('inf')
+                self._extend()
+            level += 1
+
+    def fill(self, maxlevels=-1):
+        """ Extend the planning graph until it is leveled, or until a specified
+        number of levels have been added
+        """
+        while not self._is_leveled:
+            if maxlevels == 0: break
+            self._extend()
+            maxlevels -= 1
+        return self
+
+    def _extend(self):
+        """ Extend the planning graph by a new action layer and a new literal layer """
+        if self._is_leveled: return
+
+        index = self.index
+        parent_literals = self.literal_layers[-1]
+        parent_actions = parent_literals.parent_layer
+        actions = parent_actions.members
+        literals = parent_literals.members
+        for a in bits(index.all_actions & ~actions):
+            if not index.preconditions[a] & ~parent_literals.members:
+                actions |= 1 << a
+                literals |= index.effects[a]
+
+        action_layer = BitsetActionLayer(index, actions, parent_literals,
+                                         self._serialize, self._ignore_mutexes)
+        literal_layer = BitsetLiteralLayer(index, literals, action_layer, self._ignore_mutexes)
+        action_layer.update_mutexes()
+        literal_layer.update_mutexes()
+        self.action_layers.append(action_layer)
+        self.literal_layers.append(literal_layer)
+        self._is_leveled = literal_layer == parent_literals
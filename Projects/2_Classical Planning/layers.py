@@ -1,8 +1,9 @@
 
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
-from collections import defaultdict, MutableSet
+from itertools import chain, combinations, product
+from collections import defaultdict
+from collections.abc import MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -114,6 +115,10 @@ class BaseLayer(MutableSet):
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
         mutexes are *always* enforced). For example, a literal X is always mutex
         with ~X, but "competing needs" or "inconsistent support" can be skipped
+
+    _previous : BaseLayer (or subclass)
+        The layer of the same kind at the previous level of the planning graph
+        when this layer was built from it (None otherwise); see _mutex_candidates
     """
     def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
         """
@@ -135,6 +140,7 @@ class BaseLayer(MutableSet):
         self._mutexes = defaultdict(set)
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
+        self._previous = items if isinstance(items, type(self)) else None
 
     def __contains__(self, item):
         return item in self.__store
@@ -166,6 +172,30 @@ class BaseLayer(MutableSet):
     def is_mutex(self, itemA, itemB):
         return itemA in self._mutexes.get(itemB, [])
 
+    def _mutex_candidates(self):
+        """ Return the pairs of items whose mutex status must be evaluated
+
+        Layers grow monotonically and mutexes only disappear from one level of a
+        planning graph to the next, so when the layer was built from the layer
+        at the previous level, a pair of items that were both in that layer and
+        not mutex there is not mutex here either. Only the pairs involving a new
+        item and the pairs that were mutex at the previous level are returned.
+        """
+        previous = self._previous
+        if previous is None:
+            return combinations(iter(self), 2)
+        new = [item for item in self if item not in previous]
+        old = [item for item in self if item in previous]
+        return chain(combinations(new, 2), product(new, old), self._previous_mutexes(old))
+
+    def _previous_mutexes(self, old):
+        seen = set()
+        for itemA in old:
+            seen.add(itemA)
+            for itemB in self._previous._mutexes.get(itemA, ()):
+                if itemB not in seen and itemB in self:
+                    yield itemA, itemB
+
 
 class BaseActionLayer(BaseLayer):
     def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
@@ -176,17 +206,23 @@ class BaseActionLayer(BaseLayer):
             self.children.update({k: set(v) for k, v in actions.children.items()})
 
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
+        for actionA, actionB in self._mutex_candidates():
             if self._serialize and actionA.no_op == actionB.no_op == False:
                 self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                    or self._interference(actionA, actionB)):
+            elif self._static_mutex(actionA, actionB):
                 self.set_mutex(actionA, actionB)
             elif self._ignore_mutexes:
                 continue
             elif self._competing_needs(actionA, actionB):
                 self.set_mutex(actionA, actionB)
 
+    def _static_mutex(self, actionA, actionB):
+        """ Return True if the actions are mutex in every state (by inconsistent
+        effects or interference)
+        """
+        return (self._inconsistent_effects(actionA, actionB)
+                or self._interference(actionA, actionB))
+
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
         self.parents[action] |= set(literals)
@@ -204,7 +240,7 @@ class BaseLiteralLayer(BaseLayer):
             self.children.update({k: set(v) for k, v in literals.children.items()})
 
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
+        for literalA, literalB in self._mutex_candidates():
             if self._negation(literalA, literalB):
                 self.set_mutex(literalA, literalB)
             elif self._ignore_mutexes:
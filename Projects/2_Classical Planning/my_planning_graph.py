@@ -1,11 +1,67 @@
+from collections import defaultdict
+from functools import lru_cache
 from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
+from _utils import state_values
+
 from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
 
 
+@lru_cache(maxsize=8)
+def static_mutexes(actions):
+    """ Return a table of the action pairs that are mutex in every state
+
+    Inconsistent effects and interference only depend on the preconditions and
+    effects of the two actions, so they are computed once for all the actions
+    of a problem (a tuple of ActionNode, no-ops included) and the table is
+    shared by every planning graph built for that problem.
+
+    Returns
+    -------
+    dict
+        Mapping from each action to the frozenset of actions that are mutex
+        with it by inconsistent effects or interference
+    """
+    needs, makes = defaultdict(set), defaultdict(set)
+    for action in actions:
+        for literal in action.preconditions:
+            needs[literal].add(action)
+        for literal in action.effects:
+            makes[literal].add(action)
+    table = {action: set() for action in actions}
+    for action in actions:
+        for literal in action.effects:
+            table[action] |= makes[~literal] | needs[~literal]
+        for literal in action.preconditions:
+            table[action] |= makes[~literal]
+    for action, mutexes in table.items():
+        for other in mutexes:
+            table[other].add(action)
+    return {action: frozenset(mutexes - {action}) for action, mutexes in table.items()}
+
+
 class ActionLayer(BaseActionLayer):
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False,
+                 static_mutexes=None):
+        """
+        Parameters
+        ----------
+        static_mutexes : dict
+            A table from static_mutexes() to look up inconsistent effects and
+            interference; inherited from `actions` when it is an ActionLayer.
+            Pairs of actions missing from the table are compared directly.
+        """
+        super().__init__(actions, parent_layer, serialize, ignore_mutexes)
+        if static_mutexes is None and isinstance(actions, ActionLayer):
+            static_mutexes = actions.static_mutexes
+        self.static_mutexes = static_mutexes
+
+    def _static_mutex(self, actionA, actionB):
+        if self.static_mutexes and actionA in self.static_mutexes and actionB in self.static_mutexes:
+            return actionB in self.static_mutexes[actionA]
+        return super()._static_mutex(actionA, actionB)
 
     def _inconsistent_effects(self, actionA, actionB):
         """ Return True if an effect of one action negates an effect of the other
@@ -114,9 +170,9 @@ class PlanningGraph:
         problem : PlanningProblem
             An instance of the PlanningProblem class
 
-        state : tuple(bool)
-            An ordered sequence of True/False values indicating the literal value
-            of the corresponding fluent in problem.state_map
+        state : int or tuple(bool)
+            A bitmask (or an ordered sequence of True/False values) indicating
+            the literal value of the corresponding fluent in problem.state_map
 
         serialize : bool
             Flag indicating whether to serialize non-persistence actions. Actions
@@ -135,8 +191,9 @@ class PlanningGraph:
         
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
-        literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        literals = [s if f else ~s for f, s in zip(state_values(state, problem.state_map), problem.state_map)]
+        root = ActionLayer(static_mutexes=static_mutexes(tuple(self._actionNodes)))
+        layer = LiteralLayer(literals, root, self._ignore_mutexes)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
@@ -4,8 +4,9 @@ from functools import lru_cache
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
-from my_planning_graph import PlanningGraph
+from _utils import encode_bitmask, encode_state
+from bitset_graph import BitsetPlanningGraph, GraphIndex
+from strips import StripsTask
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -16,7 +17,15 @@ class BasePlanningProblem(Problem):
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
-        super().__init__(self.initial_state_TF, goal=goal)
+        # states are bitmasks: bit i is set when self.state_map[i] is True
+        super().__init__(encode_bitmask(initial, self.state_map), goal=goal)
+
+    @lru_cache()
+    def graph_index(self):
+        """ Return the GraphIndex of the problem, compiled on the first call and
+        shared by the planning graphs of the h_pg_* heuristics
+        """
+        return GraphIndex(self)
 
     @lru_cache()
     def h_unmet_goals(self, node):
@@ -25,7 +34,7 @@ class BasePlanningProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
+        return bin(self.strips_task().goal_pos & ~node.state).count('1')
 
     @lru_cache()
     def h_pg_levelsum(self, node):
@@ -38,7 +47,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = BitsetPlanningGraph(self, node.state, serialize=True, ignore_mutexes=True, index=self.graph_index())
         score = pg.h_levelsum()
         return score
 
@@ -53,7 +62,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = BitsetPlanningGraph(self, node.state, serialize=True, ignore_mutexes=True, index=self.graph_index())
         score = pg.h_maxlevel()
         return score
 
@@ -67,37 +76,73 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
+        pg = BitsetPlanningGraph(self, node.state, serialize=True, index=self.graph_index())
         score = pg.h_setlevel()
         return score
 
+    @lru_cache()
+    def strips_task(self):
+        """ Return the StripsTask of the problem, compiled on the first call and
+        shared by the relaxed-plan heuristics
+        """
+        return StripsTask(self)
+
+    @lru_cache()
+    def h_max(self, node):
+        """ This heuristic ignores delete effects and estimates the cost of the
+        goals by the most expensive one, where reaching a fact costs one more
+        than the most expensive precondition of the cheapest action achieving
+        it. It is admissible.
+
+        See Also
+        --------
+        strips.StripsTask.h_max
+        """
+        return self.strips_task().h_max(node.state)
+
+    @lru_cache()
+    def h_add(self, node):
+        """ This heuristic ignores delete effects and estimates the cost of the
+        goals by the sum of their costs, where reaching a fact costs one more
+        than the sum of the costs of the preconditions of the cheapest action
+        achieving it. It is not admissible.
+
+        See Also
+        --------
+        strips.StripsTask.h_add
+        """
+        return self.strips_task().h_add(node.state)
+
+    @lru_cache()
+    def h_ff(self, node):
+        """ This heuristic counts the actions of a plan that reaches the goals
+        when delete effects are ignored (the FF heuristic). It is not
+        admissible.
+
+        See Also
+        --------
+        strips.StripsTask.h_ff
+        """
+        return self.strips_task().h_ff(node.state)
+
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        return self.strips_task().applicable(state)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
-        return tuple([
-            (f and s not in action.effect_rem) or (s in action.effect_add)
-            for f, s in zip(state, self.state_map)
-        ])
+        return self.strips_task().apply(state, action)
+
+    def predecessors(self, state):
+        """ Return the (action, previous state) pairs such that executing the
+        action in the previous state gives the given state (see
+        strips.StripsTask.regress and
+        aimacode.search.bidirectional_breadth_first_search)
+        """
+        return self.strips_task().regress(state)
 
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached """
-        return all(f for f, c in zip(state, self.state_map) if c in self.goal)
+        return self.strips_task().is_goal(state)
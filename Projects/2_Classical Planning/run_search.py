@@ -1,10 +1,21 @@
 
 import argparse
+import csv
+import json
+import multiprocessing
+import signal
+from timeit import default_timer as timer
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
-    greedy_best_first_graph_search, depth_limited_search,
-    recursive_best_first_search)
+    greedy_best_first_graph_search, depth_limited_search, InstrumentedProblem,
+    recursive_best_first_search, iterative_deepening_astar_search, sma_star_search,
+    compact_breadth_first_search, bidirectional_breadth_first_search)
 from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
 
 from _utils import run_search
@@ -44,7 +55,19 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_unmet_goals'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
             ['astar_search', astar_search, 'h_pg_maxlevel'],
-            ['astar_search', astar_search, 'h_pg_setlevel']
+            ['astar_search', astar_search, 'h_pg_setlevel'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_add'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff'],
+            ['iterative_deepening_astar_search', iterative_deepening_astar_search, 'h_unmet_goals'],
+            ['iterative_deepening_astar_search', iterative_deepening_astar_search, 'h_pg_levelsum'],
+            ['iterative_deepening_astar_search', iterative_deepening_astar_search, 'h_max'],
+            ['sma_star_search', sma_star_search, 'h_pg_levelsum'],
+            ['sma_star_search', sma_star_search, 'h_max'],
+            ['compact_breadth_first_search', compact_breadth_first_search, ""],
+            ['bidirectional_breadth_first_search', bidirectional_breadth_first_search, ""]
             ]
 
 # add a function to run all of problems and searches pairs
@@ -91,6 +114,145 @@ def main(p_choices, s_choices):
             run_search(problem_instance, search_fn, heuristic_fn)
 
 
+RESULT_FIELDS = ['problem', 'search', 'heuristic', 'status', 'expansions', 'goal_tests',
+                 'new_nodes', 'plan_length', 'time', 'peak_memory_kb']
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise SearchTimeout()
+
+
+def _limit_memory(memory):
+    """ Limit the address space of a worker process to a number of megabytes """
+    if memory and resource is not None:
+        limit = memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_job(job):
+    """ Solve one problem with one search in a worker process
+
+    Parameters
+    ----------
+    job : tuple
+        The 1-based indices of the problem in PROBLEMS and of the search in
+        SEARCHES, and the timeout of the run in seconds (None for no timeout)
+
+    Returns
+    -------
+    dict
+        The RESULT_FIELDS of the run; status is 'solved', 'unsolved' (the
+        search returned no plan), 'timeout' or 'memory'. The time covers the
+        search only, as in the serial output of _utils.run_search (building
+        the problem counts against the timeout, though). The peak memory is
+        the peak resident set size of the worker process, which only runs
+        this job.
+    """
+    p_index, s_index, timeout = job
+    pname, problem_fn = PROBLEMS[p_index-1]
+    sname, search_fn, heuristic = SEARCHES[s_index-1]
+    result = dict.fromkeys(RESULT_FIELDS)
+    result.update(problem=pname, search=sname, heuristic=heuristic)
+
+    ip = None
+    start = None
+    use_timer = bool(timeout) and hasattr(signal, 'setitimer')
+    if use_timer:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        ip = InstrumentedProblem(problem_fn())
+        # time the search only, as _utils.run_search does
+        start = timer()
+        if heuristic:
+            node = search_fn(ip, getattr(ip.problem, heuristic))
+        else:
+            node = search_fn(ip)
+        result['status'] = 'solved' if node is not None else 'unsolved'
+        result['plan_length'] = len(node.solution()) if node is not None else None
+    except SearchTimeout:
+        result['status'] = 'timeout'
+    except MemoryError:
+        result['status'] = 'memory'
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    if start is not None:
+        result['time'] = timer() - start
+    if ip is not None:
+        result.update(expansions=ip.succs, goal_tests=ip.goal_tests, new_nodes=ip.states)
+    if resource is not None:
+        result['peak_memory_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def run_parallel(p_choices, s_choices, jobs=None, timeout=None, memory=None, output=None):
+    """ Solve every pair of the selected problems and searches on a pool of
+    worker processes
+
+    Every run gets a fresh worker process (so that the caches of one run do not
+    leak into the next one and the peak memory is measured per run), limited
+    to timeout seconds and memory megabytes. Only the indices of the problem
+    and search are sent to the workers.
+
+    Parameters
+    ----------
+    p_choices, s_choices : list
+        The 1-based indices of the problems in PROBLEMS and of the searches in
+        SEARCHES
+
+    jobs : int
+        The number of worker processes (None uses one per CPU)
+
+    timeout : float
+        The time limit of each run in seconds (None for no limit)
+
+    memory : int
+        The address space limit of each worker process in megabytes (None for
+        no limit)
+
+    output : str
+        The file the results are written to, as JSON if the name ends with
+        .json and as CSV otherwise (None only prints them)
+
+    Returns
+    -------
+    list
+        The result (see run_job) of every run, in the order of the matrix
+    """
+    matrix = [(int(p), int(s), timeout) for p in p_choices for s in s_choices]
+    results = {}
+    with multiprocessing.Pool(jobs, initializer=_limit_memory, initargs=(memory,),
+                              maxtasksperchild=1) as pool:
+        for job, result in zip(matrix, pool.imap(run_job, matrix, chunksize=1)):
+            results[job] = result
+            print("{problem}, {search} {heuristic}: {status} ".format(**result) +
+                  "(plan length: {plan_length}, expansions: {expansions}, ".format(**result) +
+                  "time: {:.2f}s)".format(result['time']))
+    results = [results[job] for job in matrix]
+    if output:
+        write_results(results, output)
+    return results
+
+
+def write_results(results, filename):
+    """ Write the results of run_parallel to a JSON file if the name ends with
+    .json, and to a CSV file otherwise
+    """
+    with open(filename, 'w', newline='') as f:
+        if filename.endswith('.json'):
+            json.dump(results, f, indent=2)
+        else:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
 if __name__=="__main__":
     parser = argparse.ArgumentParser(description="Solve air cargo planning problems " + 
         "using a variety of state space search methods including uninformed, greedy, " +
@@ -103,9 +265,21 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('-j', '--jobs', type=int, default=None, metavar='N',
+                        help="Run the selected (or with -a, all) pairs of problems and searches on N worker processes.")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Time limit of each run in seconds (with --jobs).")
+    parser.add_argument('--memory', type=int, default=None,
+                        help="Memory limit of each run in megabytes (with --jobs).")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Write the results to a CSV file, or to a JSON file if the name ends with .json (with --jobs).")
     args = parser.parse_args()
 
-    if args.manual:
+    if args.jobs and (args.all or (args.problems and args.searches)):
+        p_choices = range(1, len(PROBLEMS)+1) if args.all else sorted(set(args.problems))
+        s_choices = range(1, len(SEARCHES)+1) if args.all else sorted(set(args.searches))
+        run_parallel(list(p_choices), list(s_choices), args.jobs, args.timeout, args.memory, args.output)
+    elif args.manual:
         manual()
     # add a function
     elif args.all:
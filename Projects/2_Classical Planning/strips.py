@@ -0,0 +1,200 @@
+""" Integer STRIPS representation of a planning problem and relaxed-plan heuristics
+
+A StripsTask numbers the fluents of a problem in the order of
+problem.state_map and the actions in the order of problem.actions_list.
+States are integers with bit i set when fluent i is True; every action has
+bitmasks of its positive and negative preconditions and of its add and delete
+effects, so BasePlanningProblem.actions() and result() are integer operations.
+
+The heuristics ignore delete effects. As in the planning graph, a fluent and
+its negation are separate facts (fact 2*i is "fluent i is true" and fact
+2*i + 1 is "fluent i is false"), so negative preconditions and goals are
+supported: an action that deletes a fluent achieves its negation. The cost of
+each fact is computed by a generalized Dijkstra fixpoint in which an action
+becomes applicable once its last precondition is reached:
+
+    h_max   the largest cost of any goal fact, where the cost of an action
+            is 1 plus the largest cost of its preconditions
+    h_add   the sum of the costs of the goal facts, where the cost of an
+            action is 1 plus the sum of the costs of its preconditions
+    h_ff    the number of actions in a relaxed plan extracted backwards from
+            the goals through the cheapest (h_add) achiever of each fact
+
+See Also
+--------
+Hoffmann & Nebel, "The FF Planning System" (JAIR 2001)
+Bonet & Geffner, "Planning as Heuristic Search" (AIJ 2001)
+"""
+from heapq import heappop, heappush
+
+infinity = float('inf')
+
+
+class StripsTask:
+    """ Integer-indexed preconditions, effects and goals of a planning problem
+
+    Attributes
+    ----------
+    fluents : list
+        The fluents of the problem (problem.state_map)
+
+    actions : list
+        The actions of the problem (problem.actions_list)
+
+    preconditions, effects : list
+        Mapping from each action index to the list of its precondition
+        (effect) facts
+
+    needed_by : list
+        Mapping from each fact to the list of actions that have it as a
+        precondition
+
+    pre_pos, pre_neg, add, delete : list
+        Mapping from each action index to the bitmask of the fluents that must
+        be True (False) before the action, or that it makes True (False)
+
+    goal : list
+        The goal facts
+
+    goal_pos, goal_neg : int
+        The bitmasks of the fluents that must be True (False) in a goal state
+    """
+    def __init__(self, problem):
+        self.fluents = list(problem.state_map)
+        self.actions = list(problem.actions_list)
+        index = {fluent: i for i, fluent in enumerate(self.fluents)}
+
+        def facts(pos, neg):
+            return sorted([2 * index[f] for f in pos] + [2 * index[f] + 1 for f in neg])
+
+        def mask(fluents):
+            return sum(1 << index[f] for f in fluents)
+
+        self.pre_pos = [mask(a.precond_pos) for a in self.actions]
+        self.pre_neg = [mask(a.precond_neg) for a in self.actions]
+        self.add = [mask(a.effect_add) for a in self.actions]
+        self.delete = [mask(a.effect_rem) for a in self.actions]
+        self._effects = {a: (self.add[i], self.delete[i]) for i, a in enumerate(self.actions)}
+
+        self.preconditions = [facts(a.precond_pos, a.precond_neg) for a in self.actions]
+        self.effects = [facts(a.effect_add, a.effect_rem) for a in self.actions]
+        self.needed_by = [[] for _ in range(2 * len(self.fluents))]
+        for i, preconditions in enumerate(self.preconditions):
+            for fact in preconditions:
+                self.needed_by[fact].append(i)
+        goal_pos = [g for g in problem.goal if g.op != '~']
+        goal_neg = [g.args[0] for g in problem.goal if g.op == '~']
+        self.goal = facts(goal_pos, goal_neg)
+        self.goal_pos = mask(goal_pos)
+        self.goal_neg = mask(goal_neg)
+
+    def applicable(self, state):
+        """ Return the actions whose preconditions hold in a state (a bitmask) """
+        return [action for action, pos, neg in zip(self.actions, self.pre_pos, self.pre_neg)
+                if state & pos == pos and not state & neg]
+
+    def apply(self, state, action):
+        """ Return the state (a bitmask) that results from applying an action """
+        add, delete = self._effects[action]
+        return state & ~delete | add
+
+    def is_goal(self, state):
+        """ Return True if every goal holds in a state (a bitmask) """
+        return state & self.goal_pos == self.goal_pos and not state & self.goal_neg
+
+    def regress(self, state):
+        """ Return the (action, previous state) pairs such that applying the
+        action to the previous state gives a state (a bitmask)
+
+        The previous state is the state with the add effects of the action
+        False and its delete effects True, which is the only one when every
+        action deletes only its own preconditions and adds fluents that are
+        False before (as Load, Unload and Fly in the Air Cargo domain).
+        """
+        pairs = []
+        for action, pos, neg, add, delete in zip(self.actions, self.pre_pos, self.pre_neg,
+                                                 self.add, self.delete):
+            if state & add != add or state & delete:
+                continue
+            previous = state & ~add | delete
+            if previous & pos == pos and not previous & neg:
+                pairs.append((action, previous))
+        return pairs
+
+    def state_facts(self, state):
+        """ Return the facts of a state (a bitmask) """
+        return [2 * i + (not state >> i & 1) for i in range(len(self.fluents))]
+
+    def fact_costs(self, state, combine):
+        """ Compute the relaxed cost of every fact reachable from a state
+
+        Parameters
+        ----------
+        state : int
+            The state to start from (a bitmask)
+
+        combine : callable
+            sum for the additive costs or max for the max costs
+
+        Returns
+        -------
+        tuple
+            the list of fact costs (infinity for unreachable facts) and the list
+            of the cheapest achiever of each fact (None for the facts of the
+            state and unreachable facts)
+        """
+        n_facts = len(self.needed_by)
+        cost = [infinity] * n_facts
+        achiever = [None] * n_facts
+        waiting = [len(p) for p in self.preconditions]
+        heap = []
+        for fact in self.state_facts(state):
+            cost[fact] = 0
+            heap.append((0, fact))
+        for i, preconditions in enumerate(self.preconditions):
+            if not preconditions:
+                self._apply(i, 1, cost, achiever, heap)
+
+        done = [False] * n_facts
+        while heap:
+            c, fact = heappop(heap)
+            if done[fact]:
+                continue
+            done[fact] = True
+            for i in self.needed_by[fact]:
+                waiting[i] -= 1
+                if not waiting[i]:
+                    action_cost = 1 + combine(cost[p] for p in self.preconditions[i])
+                    self._apply(i, action_cost, cost, achiever, heap)
+        return cost, achiever
+
+    def _apply(self, action, action_cost, cost, achiever, heap):
+        for fact in self.effects[action]:
+            if action_cost < cost[fact]:
+                cost[fact] = action_cost
+                achiever[fact] = action
+                heappush(heap, (action_cost, fact))
+
+    def h_max(self, state):
+        """ Return the max relaxed cost of the goals from a state """
+        cost, _ = self.fact_costs(state, max)
+        return max((cost[g] for g in self.goal), default=0)
+
+    def h_add(self, state):
+        """ Return the additive relaxed cost of the goals from a state """
+        cost, _ = self.fact_costs(state, sum)
+        return sum(cost[g] for g in self.goal)
+
+    def h_ff(self, state):
+        """ Return the length of a relaxed plan from a state to the goals """
+        cost, achiever = self.fact_costs(state, sum)
+        if any(cost[g] == infinity for g in self.goal):
+            return infinity
+        plan = set()
+        stack = [g for g in self.goal if achiever[g] is not None]
+        while stack:
+            action = achiever[stack.pop()]
+            if action not in plan:
+                plan.add(action)
+                stack.extend(p for p in self.preconditions[action] if achiever[p] is not None)
+        return len(plan)
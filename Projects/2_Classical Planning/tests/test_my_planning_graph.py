@@ -11,8 +11,9 @@ from example_have_cake import have_cake
 from air_cargo_problems import (
     air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
 )
-from my_planning_graph import PlanningGraph, LiteralLayer, ActionLayer
+from my_planning_graph import PlanningGraph, LiteralLayer, ActionLayer, static_mutexes
 from layers import makeNoOp, make_node
+from bitset_graph import BitsetPlanningGraph
 
 
 def chain_dedent(str, *args, **kwargs):
@@ -355,5 +356,98 @@ class Test_8_SetLevelHeuristic(BaseHeuristicTest):
         self.assertEqual(self.ac_problem_4.h_pg_setlevel(self.ac_node_4), 6, self.msg)
 
 
+class Test_9_BitsetPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.problems = [have_cake(), air_cargo_p1(), air_cargo_p2()]
+
+    def test_9a_same_layers_and_mutexes(self):
+        for problem in self.problems:
+            for serialize, ignore_mutexes in [(False, False), (True, False), (True, True)]:
+                pg = PlanningGraph(problem, problem.initial, serialize, ignore_mutexes).fill()
+                bpg = BitsetPlanningGraph(problem, problem.initial, serialize, ignore_mutexes).fill()
+                self.assertEqual(len(pg.literal_layers), len(bpg.literal_layers))
+                for layer, blayer in zip(pg.literal_layers + pg.action_layers,
+                                         bpg.literal_layers + bpg.action_layers):
+                    self.assertEqual(set(layer), set(blayer))
+                    for x, y in combinations(layer, 2):
+                        self.assertEqual(layer.is_mutex(x, y), blayer.is_mutex(x, y),
+                                         "{} and {}".format(x, y))
+
+    def test_9b_same_heuristics(self):
+        for problem in self.problems:
+            for h, ignore_mutexes in [("h_levelsum", True), ("h_maxlevel", True), ("h_setlevel", False)]:
+                pg = PlanningGraph(problem, problem.initial, True, ignore_mutexes)
+                bpg = BitsetPlanningGraph(problem, problem.initial, True, ignore_mutexes)
+                self.assertEqual(getattr(pg, h)(), getattr(bpg, h)(), h)
+
+    def test_9c_unreachable_goal(self):
+        problem = have_cake()
+        problem.actions_list = [a for a in problem.actions_list if a.name != "Eat"]
+        bpg = BitsetPlanningGraph(problem, problem.initial)
+        self.assertEqual(bpg.h_levelsum(), float("inf"))
+        self.assertEqual(bpg.h_setlevel(), float("inf"))
+
+
+class Test_10_IncrementalMutexes(unittest.TestCase):
+    def _recompute(self, layer, layer_type, *args):
+        fresh = layer_type(list(layer), layer.parent_layer, *args)
+        fresh.parents.update(layer.parents)
+        fresh.children.update(layer.children)
+        fresh.update_mutexes()
+        return fresh
+
+    def test_10a_same_mutexes_as_full_update(self):
+        for problem in [have_cake(), air_cargo_p1()]:
+            pg = PlanningGraph(problem, problem.initial, serialize=False).fill()
+            self.assertGreater(len(pg.action_layers), 1)
+            for layer in pg.action_layers:
+                self.assertIsNotNone(layer._previous)
+                fresh = self._recompute(layer, ActionLayer, False)
+                self.assertIsNone(fresh._previous)
+                self.assertEqual(layer._mutexes, fresh._mutexes)
+            for layer in pg.literal_layers[1:]:
+                fresh = self._recompute(layer, LiteralLayer)
+                self.assertEqual(layer._mutexes, fresh._mutexes)
+
+
+class Test_11_StaticMutexTable(unittest.TestCase):
+    def test_11a_table_matches_pairwise_tests(self):
+        for problem in [have_cake(), air_cargo_p1()]:
+            pg = PlanningGraph(problem, problem.initial)
+            table = static_mutexes(tuple(pg._actionNodes))
+            layer = ActionLayer(pg._actionNodes)
+            for action in pg._actionNodes:
+                layer.add_inbound_edges(action, action.preconditions)
+                layer.add_outbound_edges(action, action.effects)
+            for actionA, actionB in combinations(pg._actionNodes, 2):
+                expected = (layer._inconsistent_effects(actionA, actionB)
+                            or layer._interference(actionA, actionB))
+                self.assertEqual(actionB in table[actionA], expected, "{} and {}".format(actionA, actionB))
+                self.assertEqual(actionA in table[actionB], expected)
+
+    def test_11b_table_shared_by_graphs(self):
+        problem = have_cake()
+        pg1 = PlanningGraph(problem, problem.initial).fill()
+        pg2 = PlanningGraph(problem, problem.initial).fill()
+        self.assertIs(pg1.action_layers[-1].static_mutexes, pg2.action_layers[-1].static_mutexes)
+
+
+class Test_12_GraphIndexTemplate(unittest.TestCase):
+    def test_12a_index_compiled_once(self):
+        problem = air_cargo_p1()
+        self.assertIs(problem.graph_index(), problem.graph_index())
+
+    def test_12b_shared_index_same_heuristics(self):
+        problem = air_cargo_p2()
+        index = problem.graph_index()
+        state = problem.initial
+        for action in problem.actions(state)[:3]:
+            state = problem.result(state, action)
+            for h, ignore_mutexes in [("h_levelsum", True), ("h_maxlevel", True), ("h_setlevel", False)]:
+                shared = BitsetPlanningGraph(problem, state, True, ignore_mutexes, index=index)
+                fresh = BitsetPlanningGraph(problem, state, True, ignore_mutexes)
+                self.assertEqual(getattr(shared, h)(), getattr(fresh, h)(), h)
+
+
 if __name__ == '__main__':
     unittest.main()
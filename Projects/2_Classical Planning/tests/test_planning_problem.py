@@ -0,0 +1,138 @@
+import random
+import unittest
+
+from aimacode.search import Node
+from aimacode.utils import InternedExpr, set_interning
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+from _utils import decode_state, encode_bitmask, encode_state, state_values
+
+
+def random_states(problem, count, seed=0):
+    rng = random.Random(seed)
+    state, states = problem.initial, [problem.initial]
+    for _ in range(count):
+        state = problem.result(state, rng.choice(problem.actions(state)))
+        states.append(state)
+    return states
+
+
+class TestBitmaskStates(unittest.TestCase):
+    def setUp(self):
+        self.problem = air_cargo_p2()
+
+    def test_initial_state(self):
+        problem = self.problem
+        self.assertIsInstance(problem.initial, int)
+        self.assertEqual(state_values(problem.initial, problem.state_map), problem.initial_state_TF)
+        fs = decode_state(problem.initial, problem.state_map)
+        self.assertEqual(encode_bitmask(fs, problem.state_map), problem.initial)
+        self.assertEqual(encode_state(fs, problem.state_map), problem.initial_state_TF)
+
+    def test_actions_and_result(self):
+        problem = self.problem
+        for state in random_states(problem, 30):
+            fs = decode_state(state, problem.state_map)
+            expected = [a for a in problem.actions_list
+                        if a.precond_pos <= set(fs.pos) and not a.precond_neg & set(fs.pos)]
+            self.assertEqual(problem.actions(state), expected)
+            for action in expected:
+                pos = (set(fs.pos) - action.effect_rem) | action.effect_add
+                fs_next = decode_state(problem.result(state, action), problem.state_map)
+                self.assertEqual(set(fs_next.pos), pos)
+
+    def test_goal_test_and_unmet_goals(self):
+        problem = self.problem
+        goal_state = sum(1 << i for i, f in enumerate(problem.state_map) if f in problem.goal)
+        self.assertTrue(problem.goal_test(goal_state))
+        self.assertFalse(problem.goal_test(problem.initial))
+        self.assertEqual(problem.h_unmet_goals(Node(goal_state)), 0)
+        self.assertEqual(problem.h_unmet_goals(Node(problem.initial)), len(problem.goal))
+
+    def test_predecessors(self):
+        problem = self.problem
+        for state in random_states(problem, 30):
+            for action in problem.actions(state):
+                self.assertIn((action, state), problem.predecessors(problem.result(state, action)))
+            for action, previous in problem.predecessors(state):
+                self.assertIn(action, problem.actions(previous))
+                self.assertEqual(problem.result(previous, action), state)
+
+    def test_goal_states(self):
+        problem = self.problem
+        goal_states = problem.goal_states()
+        self.assertEqual(len(goal_states), 3 ** len(problem.planes))
+        self.assertEqual(len(set(goal_states)), len(goal_states))
+        self.assertTrue(all(problem.goal_test(state) for state in goal_states))
+
+    def test_planning_graph_accepts_bitmask(self):
+        problem = have_cake()
+        state = problem.result(problem.initial, problem.actions_list[0])
+        values = state_values(state, problem.state_map)
+        self.assertEqual(PlanningGraph(problem, state).h_setlevel(),
+                         PlanningGraph(problem, values).h_setlevel())
+
+
+class TestRelaxedHeuristics(unittest.TestCase):
+    def setUp(self):
+        self.cake_problem = have_cake()
+        self.ac_problem_1 = air_cargo_p1()
+        self.ac_problem_2 = air_cargo_p2()
+
+    def test_initial_values(self):
+        node = Node(self.ac_problem_1.initial)
+        self.assertEqual(self.ac_problem_1.h_max(node), 2)
+        self.assertEqual(self.ac_problem_1.h_add(node), 6)
+        self.assertEqual(self.ac_problem_1.h_ff(node), 6)
+
+    def test_negative_preconditions(self):
+        # Have(Cake) must be eaten (deleted) before Bake(Cake) can restore it
+        problem = self.cake_problem
+        state = problem.result(problem.initial, problem.actions_list[0])
+        node = Node(state)
+        self.assertEqual(problem.h_max(node), 1)
+        self.assertEqual(problem.h_ff(node), 1)
+
+    def test_goal_state(self):
+        problem = self.cake_problem
+        state = problem.initial
+        for action in problem.actions_list:
+            state = problem.result(state, action)
+        self.assertTrue(problem.goal_test(state))
+        node = Node(state)
+        self.assertEqual((problem.h_max(node), problem.h_add(node), problem.h_ff(node)), (0, 0, 0))
+
+    def test_max_matches_relaxed_planning_graph(self):
+        for problem in [self.ac_problem_1, self.ac_problem_2]:
+            for state in random_states(problem, 20):
+                node = Node(state)
+                self.assertEqual(problem.h_max(node), problem.h_pg_maxlevel(node))
+                self.assertLessEqual(problem.h_max(node), problem.h_ff(node))
+                self.assertLessEqual(problem.h_ff(node), problem.h_add(node))
+
+    def test_unreachable_goal(self):
+        problem = have_cake()
+        problem.actions_list = [a for a in problem.actions_list if a.name != "Eat"]
+        node = Node(problem.initial)
+        self.assertEqual(problem.h_add(node), float("inf"))
+        self.assertEqual(problem.h_ff(node), float("inf"))
+
+
+class TestInternedProblem(unittest.TestCase):
+    def setUp(self):
+        self.previous = set_interning(True)
+
+    def tearDown(self):
+        set_interning(self.previous)
+
+    def test_interned_problem(self):
+        problem = air_cargo_p1()
+        self.assertTrue(all(isinstance(f, InternedExpr) for f in problem.state_map))
+        node = Node(problem.initial)
+        self.assertEqual(problem.h_pg_setlevel(node), 4)
+        self.assertEqual(problem.h_ff(node), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
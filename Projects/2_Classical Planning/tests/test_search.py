@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+import signal
+import tempfile
+import unittest
+
+from aimacode.search import (
+    InstrumentedProblem, astar_search, bidirectional_breadth_first_search, breadth_first_search,
+    compact_breadth_first_search, iterative_deepening_astar_search, sma_star_search,
+    uniform_cost_search
+)
+from aimacode.utils import IndexedPriorityQueue
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+from example_have_cake import have_cake
+from run_search import RESULT_FIELDS, run_job, run_parallel
+
+
+class TestIndexedPriorityQueue(unittest.TestCase):
+    def test_decrease_key(self):
+        queue = IndexedPriorityQueue(min, f=lambda item: item[1], key=lambda item: item[0])
+        for item in [('a', 5), ('b', 3), ('c', 4)]:
+            queue.append(item)
+        queue.append(('a', 1))
+        self.assertEqual(len(queue), 3)
+        self.assertIn('a', queue)
+        self.assertEqual(queue['a'], ('a', 1))
+        self.assertEqual([queue.pop() for _ in range(len(queue))], [('a', 1), ('b', 3), ('c', 4)])
+        self.assertEqual(len(queue), 0)
+        self.assertRaises(IndexError, queue.pop)
+
+    def test_delete(self):
+        queue = IndexedPriorityQueue(min, f=lambda item: item)
+        for item in [3, 1, 2]:
+            queue.append(item)
+        del queue[1]
+        self.assertNotIn(1, queue)
+        self.assertEqual([queue.pop(), queue.pop()], [2, 3])
+
+
+class TestBestFirstSearch(unittest.TestCase):
+    def test_astar_admissible_is_optimal(self):
+        for problem_fn in [air_cargo_p1, air_cargo_p2]:
+            problem = problem_fn()
+            bfs = breadth_first_search(problem)
+            node = astar_search(problem, problem.h_unmet_goals)
+            self.assertEqual(len(node.solution()), len(bfs.solution()))
+            self.assertTrue(problem.goal_test(node.state))
+
+    def test_each_state_expanded_once(self):
+        expanded = []
+
+        class RecordingProblem(InstrumentedProblem):
+            def actions(self, state):
+                expanded.append(state)
+                return super().actions(state)
+
+        problem = RecordingProblem(air_cargo_p2())
+        node = astar_search(problem, problem.h_unmet_goals)
+        self.assertEqual(len(node.solution()), 9)
+        self.assertEqual(len(expanded), len(set(expanded)))
+
+
+class TestMemoryBoundedSearch(unittest.TestCase):
+    def test_ida_star_is_optimal(self):
+        for problem_fn in [air_cargo_p1, air_cargo_p2]:
+            problem = problem_fn()
+            for table_size in [0, 100000]:
+                node = iterative_deepening_astar_search(problem, problem.h_unmet_goals, table_size)
+                self.assertEqual(len(node.solution()), len(breadth_first_search(problem).solution()))
+                self.assertTrue(problem.goal_test(node.state))
+
+    def test_sma_star_is_optimal(self):
+        for problem_fn in [air_cargo_p1, air_cargo_p2]:
+            problem = problem_fn()
+            node = sma_star_search(problem, problem.h_unmet_goals, max_nodes=1000)
+            self.assertEqual(len(node.solution()), len(breadth_first_search(problem).solution()))
+            self.assertTrue(problem.goal_test(node.state))
+
+    def test_sma_star_small_memory(self):
+        problem = have_cake()
+        node = sma_star_search(problem, problem.h_unmet_goals, max_nodes=5)
+        self.assertEqual(len(node.solution()), len(breadth_first_search(problem).solution()))
+        node = sma_star_search(air_cargo_p1(), air_cargo_p1().h_unmet_goals, max_nodes=50)
+        self.assertEqual(len(node.solution()), 6)
+
+    def test_sma_star_out_of_memory(self):
+        problem = air_cargo_p1()
+        self.assertIsNone(sma_star_search(problem, problem.h_unmet_goals, max_nodes=3))
+
+
+class TestCompactBreadthFirstSearch(unittest.TestCase):
+    def test_same_solution_as_breadth_first_search(self):
+        for problem_fn in [air_cargo_p1, air_cargo_p2]:
+            problem = problem_fn()
+            node = compact_breadth_first_search(problem)
+            self.assertEqual(node.solution(), breadth_first_search(problem).solution())
+            self.assertEqual(node.path_cost, len(node.solution()))
+            self.assertTrue(problem.goal_test(node.state))
+
+    def test_bidirectional_is_optimal(self):
+        for problem_fn, length in [(air_cargo_p1, 6), (air_cargo_p2, 9), (air_cargo_p3, 12)]:
+            problem = problem_fn()
+            node = bidirectional_breadth_first_search(problem)
+            self.assertEqual(len(node.solution()), length)
+            self.assertTrue(problem.goal_test(node.state))
+
+    def test_bidirectional_does_less_work(self):
+        calls = {'actions': 0, 'predecessors': 0}
+
+        class CountingProblem(InstrumentedProblem):
+            def actions(self, state):
+                calls['actions'] += 1
+                return super().actions(state)
+
+            def predecessors(self, state):
+                calls['predecessors'] += 1
+                return super().predecessors(state)
+
+        forward = InstrumentedProblem(air_cargo_p2())
+        bidirectional = CountingProblem(air_cargo_p2())
+        compact_breadth_first_search(forward)
+        bidirectional_breadth_first_search(bidirectional)
+        # both directions count as expansions
+        self.assertGreater(calls['predecessors'], 0)
+        self.assertEqual(bidirectional.succs, calls['actions'] + calls['predecessors'])
+        self.assertLess(bidirectional.succs, forward.succs)
+        self.assertLess(bidirectional.states, forward.states)
+
+
+class TestParallelRunner(unittest.TestCase):
+    def test_run_job(self):
+        result = run_job((1, 1, None))
+        self.assertEqual(set(result), set(RESULT_FIELDS))
+        self.assertEqual(result['status'], 'solved')
+        self.assertEqual(result['plan_length'], 6)
+        self.assertEqual(result['expansions'], 43)
+
+    def test_timeout(self):
+        handler = signal.getsignal(signal.SIGALRM)
+        result = run_job((4, 1, 0.2))
+        self.assertIs(signal.getsignal(signal.SIGALRM), handler)
+        self.assertEqual(result['status'], 'timeout')
+        self.assertIsNone(result['plan_length'])
+        self.assertGreater(result['expansions'], 0)
+
+    def test_run_parallel(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ['results.csv', 'results.json']:
+                filename = os.path.join(tmp, name)
+                results = run_parallel([1, 2], [1, 8], jobs=2, timeout=60, output=filename)
+                self.assertEqual([(r['problem'][-1], r['search']) for r in results],
+                                 [('1', 'breadth_first_search'), ('1', 'astar_search'),
+                                  ('2', 'breadth_first_search'), ('2', 'astar_search')])
+                self.assertEqual([r['plan_length'] for r in results], [6, 6, 9, 9])
+                with open(filename) as f:
+                    rows = json.load(f) if name.endswith('.json') else list(csv.DictReader(f))
+                self.assertEqual([int(row['plan_length']) for row in rows], [6, 6, 9, 9])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import gc
+import unittest
+import weakref
+
+from aimacode.utils import Expr, InternedExpr, expr, intern_expr, set_interning
+
+
+class TestInternedExpr(unittest.TestCase):
+    def setUp(self):
+        self.previous = set_interning(True)
+
+    def tearDown(self):
+        set_interning(self.previous)
+
+    def test_canonical_objects(self):
+        x = expr('At(C1, SFO)')
+        self.assertIsInstance(x, InternedExpr)
+        self.assertIs(x, expr('At(C1,  SFO)'))
+        self.assertIs(~x, ~expr('At(C1, SFO)'))
+        self.assertIs(~~x, x)
+        self.assertNotEqual(x, expr('At(C2, SFO)'))
+
+    def test_equal_to_plain_expr(self):
+        x = expr('At(C1, SFO)')
+        plain = Expr('At', Expr('C1'), Expr('SFO'))
+        self.assertTrue(x == plain and plain == x)
+        self.assertFalse(x != plain or plain != x)
+        self.assertEqual(hash(x), hash(plain))
+        self.assertIn(plain, {x})
+        self.assertIs(intern_expr(plain), x)
+        self.assertIs(InternedExpr('At', Expr('C1'), Expr('SFO')), x)
+        self.assertEqual(~plain, ~x)
+
+    def test_unused_expressions_are_freed(self):
+        gc.collect()
+        size = len(InternedExpr._table)
+        x = intern_expr(Expr('Leak', Expr('C9'), Expr('XYZ')))
+        negation = ~x
+        self.assertEqual(len(InternedExpr._table), size + 4)
+        ref = weakref.ref(x)
+        del x, negation
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(len(InternedExpr._table), size)
+
+if __name__ == '__main__':
+    unittest.main()